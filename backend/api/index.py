@@ -1,8 +1,10 @@
 # Vercel serverless function entry point for FastAPI
-import sys
-import traceback
 import json
 import os
+import base64
+from app.log import flush_logs, get_logger
+
+log = get_logger("app.vercel")
 
 # Initialize handler variable
 _original_handler = None
@@ -10,24 +12,20 @@ _original_handler = None
 try:
     # Import Mangum first
     from mangum import Mangum
-    print("✅ Mangum imported", file=sys.stderr, flush=True)
     
     # Import the FastAPI app
     from app.main import app
-    print("✅ FastAPI app imported", file=sys.stderr, flush=True)
     
     # Create Mangum handler for Vercel
     # Mangum converts ASGI (FastAPI) to AWS Lambda format (which Vercel uses)
     # Use lifespan="off" to avoid issues with startup/shutdown events
     _original_handler = Mangum(app, lifespan="off")
-    print("✅ Mangum handler created", file=sys.stderr, flush=True)
+    log.info("Mangum handler created")
     
 except Exception as e:
     # If there's an import or initialization error, create a handler that returns the error
     error_msg = str(e)
-    error_trace = traceback.format_exc()
-    print(f"❌ Error initializing FastAPI app: {error_msg}", file=sys.stderr, flush=True)
-    print(f"Traceback: {error_trace}", file=sys.stderr, flush=True)
+    log.error("error initializing FastAPI app", exc_info=e)
     
     def error_handler(event, context):
         """Fallback handler that returns error information"""
@@ -42,7 +40,7 @@ except Exception as e:
                 })
             }
         except Exception as handler_error:
-            print(f"❌ Error in error handler: {handler_error}", file=sys.stderr, flush=True)
+            log.error("error in error handler", error=str(handler_error))
             return {
                 "statusCode": 500,
                 "headers": {"Content-Type": "application/json"},
@@ -61,18 +59,32 @@ if _original_handler is None:
         }
     _original_handler = default_handler
 
+def ensure_binary_body(result: dict) -> dict:
+    """Base64-encode compressed response bodies.
+    
+    Mangum chooses between text and base64 from Content-Type alone, so a
+    gzip/br/zstd JSON body that happens to decode as UTF-8 would be returned
+    as text and corrupted by the platform. Such a body decoded cleanly, so
+    encoding it back to UTF-8 restores the exact compressed bytes.
+    """
+    headers = {key.lower(): value for key, value in (result.get("headers") or {}).items()}
+    for key, values in (result.get("multiValueHeaders") or {}).items():
+        if values:
+            headers.setdefault(key.lower(), values[-1])
+    encoding = headers.get("content-encoding", "").strip().lower()
+    body = result.get("body")
+    if encoding and encoding != "identity" and body and not result.get("isBase64Encoded"):
+        result["body"] = base64.b64encode(body.encode("utf-8")).decode("ascii")
+        result["isBase64Encoded"] = True
+    return result
+
 # Wrap handler with additional error handling for runtime errors
 def wrapped_handler(event, context):
     """Wrapper that catches runtime errors and returns proper error responses"""
     import asyncio
     
     try:
-        # Log request info for debugging
-        if event:
-            path = event.get("path", "unknown")
-            method = event.get("httpMethod", "unknown")
-            print(f"📥 Request: {method} {path}", file=sys.stderr, flush=True)
-        
+        # Requests are logged once each by AccessLogMiddleware
         # Call the original handler
         # Mangum's handler is async and returns a coroutine, but error handlers are sync
         handler_result = _original_handler(event, context)
@@ -84,7 +96,7 @@ def wrapped_handler(event, context):
             try:
                 loop = asyncio.get_running_loop()
                 # We're in a running loop, which shouldn't happen in Vercel but handle it
-                print("⚠️ Already in running event loop, using ThreadPoolExecutor", file=sys.stderr, flush=True)
+                log.warning("already in running event loop, using ThreadPoolExecutor")
                 import concurrent.futures
                 with concurrent.futures.ThreadPoolExecutor() as executor:
                     future = executor.submit(asyncio.run, handler_result)
@@ -95,7 +107,7 @@ def wrapped_handler(event, context):
                     result = asyncio.run(handler_result)
                 except Exception as run_error:
                     # Fallback: create new event loop manually
-                    print(f"⚠️ asyncio.run() failed: {run_error}, trying manual loop", file=sys.stderr, flush=True)
+                    log.warning("asyncio.run() failed, trying manual loop", error=str(run_error))
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
                     try:
@@ -108,9 +120,9 @@ def wrapped_handler(event, context):
         
         # Ensure result is in correct format
         if isinstance(result, dict):
-            return result
+            return ensure_binary_body(result)
         else:
-            print(f"⚠️ Handler returned unexpected type: {type(result)}", file=sys.stderr, flush=True)
+            log.warning("handler returned unexpected type", type=type(result).__name__)
             return {
                 "statusCode": 500,
                 "headers": {"Content-Type": "application/json"},
@@ -120,9 +132,7 @@ def wrapped_handler(event, context):
     except Exception as runtime_error:
         # Catch any runtime errors
         error_msg = str(runtime_error)
-        error_trace = traceback.format_exc()
-        print(f"❌ Runtime error in handler: {error_msg}", file=sys.stderr, flush=True)
-        print(f"Traceback: {error_trace}", file=sys.stderr, flush=True)
+        log.error("runtime error in handler", exc_info=runtime_error)
         
         return {
             "statusCode": 500,
@@ -134,6 +144,11 @@ def wrapped_handler(event, context):
             })
         }
 
-# Export the wrapped handler
-handler = wrapped_handler
+# Export the wrapped handler. The runtime may freeze the process as soon as
+# it returns, so wait for the background log writer to drain first
+def handler(event, context):
+    try:
+        return wrapped_handler(event, context)
+    finally:
+        flush_logs()
 
@@ -0,0 +1,456 @@
+# Cache tier shared by the task and auth paths: in-memory or Redis-protocol backend
+import asyncio
+import ssl
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from urllib.parse import unquote, urlparse
+from app.config import settings
+from app.log import get_logger
+from app.metrics import REGISTRY
+
+log = get_logger("app.cache")
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total",
+    "Cache lookups by namespace and result (hit, miss)",
+    ("namespace", "result"),
+)
+CACHE_EVICTIONS = REGISTRY.counter(
+    "cache_evictions_total",
+    "In-memory cache entries dropped, by reason (capacity, expired)",
+    ("reason",),
+)
+CACHE_COALESCED = REGISTRY.counter(
+    "cache_coalesced_loads_total",
+    "Misses that waited for another request's load instead of querying",
+    ("namespace",),
+)
+CACHE_MEMORY_ENTRIES = REGISTRY.gauge(
+    "cache_memory_entries",
+    "Entries held by in-memory cache backends",
+)
+CACHE_MEMORY_BYTES = REGISTRY.gauge(
+    "cache_memory_bytes",
+    "Bytes of keys and values held by in-memory cache backends",
+)
+CACHE_ERRORS = REGISTRY.counter(
+    "cache_errors_total",
+    "Cache backend failures, treated as misses",
+    ("operation",),
+)
+
+class CacheError(Exception):
+    """The cache backend rejected a command or could not be reached"""
+
+class MemoryBackend:
+    """Process-local LRU/TTL store; the default when CACHE_URL is unset.
+    
+    Bounded by entry count and by the bytes of keys plus values, whichever is
+    reached first. Writes also sweep out expired entries (at most once per
+    `sweep_interval` seconds), so entries nobody reads again do not linger
+    until they reach the LRU end.
+    """
+    
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 32 * 1024 * 1024, sweep_interval: float = 1.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        # key -> (expires_at or None, value), least recently used first
+        self._entries: OrderedDict[str, tuple[float | None, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _cost(key: str, value: bytes) -> int:
+        return len(key) + len(value)
+    
+    def _remove(self, key: str, reason: str | None = None) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        cost = self._cost(key, entry[1])
+        self._bytes -= cost
+        CACHE_MEMORY_BYTES.dec(cost)
+        CACHE_MEMORY_ENTRIES.dec()
+        if reason is not None:
+            CACHE_EVICTIONS.inc(reason=reason)
+    
+    def _live(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= now:
+            self._remove(key, "expired")
+            return None
+        return entry
+    
+    def _sweep(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]:
+            self._remove(key, "expired")
+    
+    def _store(self, key: str, value: bytes, ttl: float | None, now: float) -> None:
+        self._sweep(now)
+        self._remove(key)
+        cost = self._cost(key, value)
+        if cost > self.max_bytes:
+            return  # larger than the whole budget; never worth evicting everything for
+        self._entries[key] = (now + ttl if ttl is not None else None, value)
+        self._bytes += cost
+        CACHE_MEMORY_BYTES.inc(cost)
+        CACHE_MEMORY_ENTRIES.inc()
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)), "capacity")
+    
+    async def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl, time.monotonic())
+    
+    async def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        """Set only if absent; True when this call stored the value"""
+        with self._lock:
+            now = time.monotonic()
+            if self._live(key, now) is not None:
+                return False
+            self._store(key, value, ttl, now)
+            return True
+    
+    async def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+    
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+    
+    def size(self) -> int:
+        return len(self._entries)
+    
+    def nbytes(self) -> int:
+        return self._bytes
+
+class RedisBackend:
+    """Minimal RESP2 client for Redis-protocol servers (Redis, Valkey, Upstash).
+    
+    Supports redis:// and rediss:// (TLS) URLs with optional user, password
+    and database number. Connections belong to the event loop that opened
+    them, so idle connections are pooled per loop.
+    """
+    
+    def __init__(self, url: str, timeout: float = 1.0, max_idle: int = 4):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError("CACHE_URL must start with redis:// or rediss://")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.tls = parsed.scheme == "rediss"
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: dict[int, list] = {}  # id(loop) -> [(loop, reader, writer)]
+    
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=ssl.create_default_context() if self.tls else None
+        )
+        connection = (asyncio.get_running_loop(), reader, writer)
+        try:
+            if self.password:
+                auth = ("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)
+                await self._roundtrip(connection, auth)
+            if self.db:
+                await self._roundtrip(connection, ("SELECT", self.db))
+        except BaseException:
+            writer.close()
+            raise
+        return connection
+    
+    async def _acquire(self):
+        loop = asyncio.get_running_loop()
+        idle = self._idle.get(id(loop), [])
+        while idle:
+            connection = idle.pop()
+            if connection[0] is loop and not connection[2].is_closing():
+                return connection
+        return await self._connect()
+    
+    def _release(self, connection) -> None:
+        loop = connection[0]
+        # Drop pools that belong to event loops which have since closed
+        for key in [key for key, idle in self._idle.items() if idle and idle[0][0].is_closed()]:
+            del self._idle[key]
+        idle = self._idle.setdefault(id(loop), [])
+        if len(idle) < self.max_idle:
+            idle.append(connection)
+        else:
+            connection[2].close()
+    
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+    
+    async def _read_reply(self, reader):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("cache server closed the connection")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise CacheError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply(reader) for _ in range(length)]
+        raise CacheError(f"unexpected reply: {line[:20]!r}")
+    
+    async def _roundtrip(self, connection, args):
+        _, reader, writer = connection
+        writer.write(self._encode(args))
+        await writer.drain()
+        return await self._read_reply(reader)
+    
+    async def command(self, *args):
+        connection = await asyncio.wait_for(self._acquire(), self.timeout)
+        try:
+            reply = await asyncio.wait_for(self._roundtrip(connection, args), self.timeout)
+        except CacheError:
+            self._release(connection)  # error replies leave the stream in sync
+            raise
+        except BaseException:
+            connection[2].close()
+            raise
+        self._release(connection)
+        return reply
+    
+    async def get(self, key: str) -> bytes | None:
+        return await self.command("GET", key)
+    
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        if ttl is None:
+            await self.command("SET", key, value)
+        else:
+            await self.command("SET", key, value, "PX", max(1, int(ttl * 1000)))
+    
+    async def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        args = ["SET", key, value, "NX"]
+        if ttl is not None:
+            args += ["PX", max(1, int(ttl * 1000))]
+        return await self.command(*args) is not None
+    
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.command("DEL", *keys)
+
+class SharedCache:
+    """Namespaced, versioned read-through cache over a backend.
+    
+    Keys look like `{prefix}:{namespace}:u{user_id}:{version}:{key}`. Each
+    (namespace, user) has a version token stored in the backend, and
+    invalidate() replaces it, so every worker stops reading the old entries
+    at once and they age out by TTL. A missing version token is recreated
+    with a fresh value rather than reset, so an evicted token can only cause
+    misses, never stale hits.
+    
+    Stampede protection on a miss works at two levels. Concurrent misses in
+    one process share a single load. Across processes, a short lock key lets
+    one worker load while the others poll briefly for its result.
+    
+    Backend failures are logged and treated as misses, so an unreachable
+    cache server slows requests down but never fails them.
+    """
+    
+    VERSION_TTL = 86400.0
+    
+    def __init__(self, backend, prefix: str = "todo", ttl: float = 30.0, enabled: bool = True,
+                 lock_ttl: float = 5.0, lock_wait: float = 1.0):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+        self.enabled = enabled
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._inflight: dict[str, asyncio.Future] = {}
+    
+    @property
+    def shared(self) -> bool:
+        """True when entries and invalidations are visible to every instance"""
+        return not isinstance(self.backend, MemoryBackend)
+    
+    def _version_key(self, namespace: str, user_id: int) -> str:
+        return f"{self.prefix}:{namespace}:u{user_id}:version"
+    
+    def _report(self, operation: str, e: Exception) -> None:
+        CACHE_ERRORS.inc(operation=operation)
+        log.warning("cache operation failed", operation=operation, error=f"{type(e).__name__}: {e}")
+    
+    async def _version(self, namespace: str, user_id: int) -> str:
+        key = self._version_key(namespace, user_id)
+        version = await self.backend.get(key)
+        if version is None:
+            fresh = uuid.uuid4().hex[:12].encode()
+            if not await self.backend.add(key, fresh, self.VERSION_TTL):
+                fresh = await self.backend.get(key) or fresh
+            version = fresh
+        return version.decode() if isinstance(version, bytes) else version
+    
+    async def get_or_load(self, namespace: str, user_id: int, key: str,
+                          loader: Callable[[], Awaitable[bytes]], ttl: float | None = None) -> bytes:
+        """Return the cached value for (namespace, user, key), loading it on a miss"""
+        if not self.enabled:
+            return await loader()
+        try:
+            version = await self._version(namespace, user_id)
+            full_key = f"{self.prefix}:{namespace}:u{user_id}:{version}:{key}"
+            value = await self.backend.get(full_key)
+        except Exception as e:
+            self._report("get", e)
+            return await loader()
+        if value is not None:
+            CACHE_REQUESTS.inc(namespace=namespace, result="hit")
+            return value
+        CACHE_REQUESTS.inc(namespace=namespace, result="miss")
+        
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(full_key)
+        if pending is not None and pending.get_loop() is loop:
+            CACHE_COALESCED.inc(namespace=namespace)
+            return await asyncio.shield(pending)
+        
+        future = loop.create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await self._load_once(namespace, full_key, loader, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved so a load nobody waited on is not logged
+            raise
+        finally:
+            if self._inflight.get(full_key) is future:
+                del self._inflight[full_key]
+    
+    async def _load_once(self, namespace: str, full_key: str, loader, ttl: float | None) -> bytes:
+        lock_key = f"{full_key}:lock"
+        try:
+            locked = await self.backend.add(lock_key, b"1", self.lock_ttl)
+        except Exception as e:
+            self._report("lock", e)
+            return await loader()
+        
+        if not locked:
+            # Another worker is loading this key; wait briefly for its result
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.02)
+                try:
+                    value = await self.backend.get(full_key)
+                except Exception as e:
+                    self._report("get", e)
+                    break
+                if value is not None:
+                    CACHE_COALESCED.inc(namespace=namespace)
+                    return value
+        
+        try:
+            value = await loader()
+            try:
+                await self.backend.set(full_key, value, ttl if ttl is not None else self.ttl)
+            except Exception as e:
+                self._report("set", e)
+            return value
+        finally:
+            if locked:
+                try:
+                    await self.backend.delete(lock_key)
+                except Exception as e:
+                    self._report("unlock", e)
+    
+    async def invalidate(self, namespace: str, user_id: int) -> None:
+        """Retire every entry of a user's namespace on all workers; call after commit"""
+        if not self.enabled:
+            return
+        try:
+            await self.backend.set(
+                self._version_key(namespace, user_id), uuid.uuid4().hex[:12].encode(), self.VERSION_TTL
+            )
+        except Exception as e:
+            self._report("invalidate", e)
+    
+    async def get(self, namespace: str, key: str) -> bytes | None:
+        """Plain namespaced lookup for values that are not per-user versioned"""
+        if not self.enabled:
+            return None
+        try:
+            value = await self.backend.get(f"{self.prefix}:{namespace}:{key}")
+        except Exception as e:
+            self._report("get", e)
+            return None
+        CACHE_REQUESTS.inc(namespace=namespace, result="hit" if value is not None else "miss")
+        return value
+    
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float | None = None) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.backend.set(f"{self.prefix}:{namespace}:{key}", value, ttl if ttl is not None else self.ttl)
+        except Exception as e:
+            self._report("set", e)
+    
+    async def delete(self, namespace: str, *keys: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.backend.delete(*(f"{self.prefix}:{namespace}:{key}" for key in keys))
+        except Exception as e:
+            self._report("delete", e)
+    
+    def clear(self) -> None:
+        """Drop local entries (in-memory backend only)"""
+        if isinstance(self.backend, MemoryBackend):
+            self.backend.clear()
+
+def create_backend(url: str = "", max_entries: int = 4096, max_bytes: int = 32 * 1024 * 1024):
+    """redis:// or rediss:// selects the shared tier; empty keeps it in-process"""
+    if url:
+        return RedisBackend(url)
+    return MemoryBackend(max_entries, max_bytes)
+
+cache = SharedCache(
+    create_backend(settings.cache_url, settings.cache_max_entries, settings.cache_max_bytes),
+    ttl=settings.cache_ttl_seconds,
+    enabled=settings.cache_enabled,
+)
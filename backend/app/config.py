@@ -1,7 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
-import sys
 from pathlib import Path
+from app.log import configure_logging, get_logger
 
 # Get the backend directory (parent of app directory)
 # This ensures .env file is found regardless of where uvicorn is started from
@@ -14,6 +14,76 @@ class Settings(BaseSettings):
     database_url: str = ""
     better_auth_secret: str = ""
     cors_origins: str = ""
+    # Use the asyncpg engine and AsyncSession instead of psycopg2 in the threadpool
+    database_async: bool = False
+    # Optional read replica for list/get task routes; writers read from the primary for a while
+    database_read_url: str = ""
+    # Connection pool profile (serverless, server, test); empty picks serverless on Vercel, else server.
+    # The DATABASE_POOL_* values override the profile's defaults
+    database_pool_profile: str = ""
+    database_pool_size: int | None = None
+    database_max_overflow: int | None = None
+    database_pool_timeout: float | None = None
+    database_pool_recycle: int | None = None
+    database_connect_timeout: int = 10
+    # Transaction-mode PgBouncer (e.g. Neon "-pooler" hosts); unset detects it from the host name
+    database_pgbouncer: bool | None = None
+    # Pins are kept in process unless CACHE_URL is set: without a shared cache, a
+    # write on one worker or serverless instance does not keep the user's reads
+    # on other instances off the replica, so they may read stale data for up to
+    # the replica lag
+    read_your_writes_seconds: float = 5
+    replica_retry_seconds: float = 30
+    # Verified bearer tokens remembered until their exp (0 disables the cache)
+    auth_token_cache_size: int = 4096
+    # JWT implementation: native (stdlib hmac + orjson), jose, or pyjwt when installed
+    auth_token_codec: str = "native"
+    # Rotated signing keys as kid=secret pairs, the first signing new tokens;
+    # tokens without a kid keep verifying against BETTER_AUTH_SECRET
+    auth_keys: str = ""
+    # Bearer token for /metrics and /api/debug/*; unset hides those endpoints (404)
+    admin_token: str = ""
+    # Request count/latency metrics by route template (app/request_metrics.py)
+    request_metrics: bool = True
+    # Pool/query timings per request (app/db_telemetry.py); SERVER_TIMING=false keeps them out of responses
+    db_telemetry: bool = True
+    server_timing: bool = True
+    # Event-loop lag sampling and blocking-call detection (app/loop_monitor.py)
+    loop_monitor: bool = False
+    loop_monitor_interval_ms: float = 50
+    loop_monitor_threshold_ms: float = 100
+    # Response/lookup cache (app/cache.py); redis:// or rediss:// CACHE_URL shares it across instances
+    cache_enabled: bool = True
+    cache_url: str = ""
+    cache_ttl_seconds: float = 30
+    # In-memory backend bounds: whichever is reached first evicts least recently used entries
+    cache_max_entries: int = 4096
+    cache_max_bytes: int = 32 * 1024 * 1024
+    # Accept-Encoding negotiated compression (app/compression.py); levels favour latency
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 5
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+    # Structured JSON logs (app/log.py): level, background writer queue and access-log sampling.
+    # LOG_SAMPLE_ROUTES overrides the rate per route template, e.g. "/api/health=0.01"
+    log_level: str = "INFO"
+    log_background: bool = True
+    log_queue_size: int = 10000
+    log_sample_rate: float = 1.0
+    log_sample_routes: str = ""
+    log_slow_ms: float = 1000
+    # Request tracing (app/tracing.py). Requests whose traceparent is sampled are always
+    # traced; others with TRACING_SAMPLE_RATE. Traces are kept in memory for
+    # /api/debug/traces and appended to TRACING_FILE as JSON lines when it is set
+    tracing_enabled: bool = True
+    tracing_sample_rate: float = 0.0
+    tracing_file: str = ""
+    tracing_max_traces: int = 200
+    # How long the first response to an Idempotency-Key is replayed to retries
+    idempotency_ttl_seconds: int = 86400
+    # Delta sync log retention; clients whose watermark is older must do a full resync
+    task_change_retention_days: int = 30
     
     model_config = SettingsConfigDict(
         env_file=str(ENV_FILE) if ENV_FILE.exists() else ".env",
@@ -38,17 +108,11 @@ try:
     # Remove trailing slash from CORS_ORIGINS if present
     if settings.cors_origins and settings.cors_origins.endswith("/"):
         settings.cors_origins = settings.cors_origins.rstrip("/")
-    
-    print(f"✅ Settings initialized", file=sys.stderr, flush=True)
-    print(f"   DATABASE_URL: {'set' if settings.database_url else 'missing'}", file=sys.stderr, flush=True)
-    print(f"   BETTER_AUTH_SECRET: {'set' if settings.better_auth_secret else 'missing'}", file=sys.stderr, flush=True)
-    print(f"   CORS_ORIGINS: {settings.cors_origins or 'not set'}", file=sys.stderr, flush=True)
+    settings_error = None
     
 except Exception as e:
     # Fallback to reading directly from environment variables if Settings fails
-    print(f"⚠️ Warning: Settings initialization failed: {e}", file=sys.stderr, flush=True)
-    import traceback
-    traceback.print_exc(file=sys.stderr)
+    settings_error = e
     
     # Create a minimal settings object with fallback
     cors_origins = os.getenv("CORS_ORIGINS", "").rstrip("/")
@@ -58,3 +122,16 @@ except Exception as e:
         cors_origins=cors_origins
     )
 
+# Logging reads its level and sampling from settings, so it starts right after them
+configure_logging(settings.log_level, settings.log_background, settings.log_queue_size)
+log = get_logger("app.config")
+if settings_error is not None:
+    log.warning("settings initialization failed, using environment fallback", exc_info=settings_error)
+log.info(
+    "settings initialized",
+    database_url="set" if settings.database_url else "missing",
+    better_auth_secret="set" if settings.better_auth_secret else "missing",
+    cors_origins=settings.cors_origins or "not set",
+)
+if settings.database_read_url and not settings.cache_url:
+    log.warning("DATABASE_READ_URL is set without CACHE_URL; read-your-writes only holds on the instance that took the write")
@@ -0,0 +1,191 @@
+# Connection pool and query telemetry: per-request Server-Timing plus aggregate metrics
+import contextvars
+import time
+import weakref
+from fastapi import APIRouter, Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from app.dependencies.admin import require_admin
+from app.metrics import REGISTRY, route_template
+from app.tracing import span, start_span
+
+POOL_WAIT = REGISTRY.histogram(
+    "db_pool_wait_seconds",
+    "Time to check a connection out of the pool, including pre-ping and any new connect",
+)
+CONNECT = REGISTRY.histogram("db_connect_seconds", "Time to open a new database connection")
+QUERY = REGISTRY.histogram("db_query_seconds", "Statement execution time by SQL verb", ("operation",))
+QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "db_queries_per_request",
+    "Statements executed per request, by route template",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+# Statement text kept on db.query spans
+STATEMENT_LENGTH = 500
+
+class RequestTimings:
+    """Database time spent on behalf of one request, in seconds"""
+    
+    def __init__(self):
+        self.pool_wait = 0.0
+        self.connect = 0.0
+        self.query = 0.0
+        self.queries = 0
+    
+    def server_timing(self, total: float) -> str:
+        # Time outside the database: Python, serialization, awaiting other I/O
+        app = max(total - self.pool_wait - self.query, 0.0)
+        return ", ".join((
+            f'db;dur={self.query * 1000:.1f};desc="{self.queries} queries"',
+            f"db-pool;dur={self.pool_wait * 1000:.1f}",
+            f"db-connect;dur={self.connect * 1000:.1f}",
+            f"app;dur={app * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ))
+
+# Set by the middleware; queries run in the threadpool see it because
+# run_in_threadpool copies the request's context into the worker thread
+current_timings: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar(
+    "db_request_timings", default=None
+)
+
+_instrumented = weakref.WeakSet()
+
+def instrument_engine(engine) -> None:
+    """Attach timing hooks to an Engine (or the sync side of an AsyncEngine); idempotent"""
+    engine = getattr(engine, "sync_engine", engine)
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+    pool = engine.pool
+    checkout = pool.connect
+    
+    # The pool has no "before checkout" event, so time its connect() call itself
+    def timed_checkout():
+        start = time.perf_counter()
+        try:
+            with span("db.checkout"):
+                return checkout()
+        finally:
+            elapsed = time.perf_counter() - start
+            POOL_WAIT.observe(elapsed)
+            timings = current_timings.get()
+            if timings is not None:
+                timings.pool_wait += elapsed
+    
+    pool.connect = timed_checkout
+    
+    @event.listens_for(engine, "do_connect")
+    def before_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info["connect_start"] = time.perf_counter()
+        connection_record.info["connect_span"] = start_span("db.connect")
+    
+    @event.listens_for(pool, "connect")
+    def after_connect(dbapi_connection, connection_record):
+        start = connection_record.info.pop("connect_start", None)
+        if start is None:
+            return
+        connect_span = connection_record.info.pop("connect_span", None)
+        if connect_span is not None:
+            connect_span.end()
+        elapsed = time.perf_counter() - start
+        CONNECT.observe(elapsed)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.connect += elapsed
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        query_span = start_span("db.query", **{"db.statement": statement[:STATEMENT_LENGTH]})
+        conn.info.setdefault("query_start", []).append((time.perf_counter(), query_span))
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        start, query_span = conn.info["query_start"].pop()
+        elapsed = time.perf_counter() - start
+        verb = statement.split(None, 1)
+        QUERY.observe(elapsed, operation=verb[0].upper() if verb else "")
+        if query_span is not None:
+            query_span.end()
+        timings = current_timings.get()
+        if timings is not None:
+            timings.query += elapsed
+            timings.queries += 1
+    
+    @event.listens_for(engine, "handle_error")
+    def on_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            _, query_span = connection.info["query_start"].pop()
+            if query_span is not None:
+                query_span.error = repr(exception_context.original_exception)
+                query_span.end()
+
+# Commit spans for every ORM session, sync or async (AsyncSession runs a
+# sync Session underneath); they cover the flush as well as the COMMIT
+@event.listens_for(Session, "before_commit")
+def before_commit(session):
+    session.info["commit_span"] = start_span("db.commit")
+
+@event.listens_for(Session, "after_commit")
+def after_commit(session):
+    commit_span = session.info.pop("commit_span", None)
+    if commit_span is not None:
+        commit_span.end()
+
+@event.listens_for(Session, "after_rollback")
+def after_rollback(session):
+    commit_span = session.info.pop("commit_span", None)
+    if commit_span is not None:
+        commit_span.error = "rolled back"
+        commit_span.end()
+
+def pool_status() -> list[dict]:
+    return [
+        {"url": engine.url.render_as_string(hide_password=True), "status": engine.pool.status()}
+        for engine in list(_instrumented)
+    ]
+
+class DbTelemetryMiddleware:
+    """Pure ASGI middleware that collects database timings for each request.
+    
+    The totals are added to the response as a Server-Timing header, which
+    browser devtools show in the request's Timing tab, and the statement
+    count is recorded per route template so N+1 regressions show up in
+    db_queries_per_request.
+    """
+    
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append("Server-Timing", timings.server_timing(time.perf_counter() - start))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            route = route_template(scope)
+            QUERIES_PER_REQUEST.observe(timings.queries, route=route)
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/api/debug/db")
+async def db_report():
+    """Pool status per engine and the pool/connect/query histograms"""
+    return {"pools": pool_status(), "metrics": REGISTRY.snapshot("db_")}
@@ -0,0 +1,22 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import hmac
+from app.config import settings
+
+admin_security = HTTPBearer(auto_error=False)
+
+def require_admin(
+    credentials: HTTPAuthorizationCredentials | None = Depends(admin_security)
+) -> None:
+    """Guards operational endpoints (metrics, debug reports) with the ADMIN_TOKEN bearer token"""
+    if not settings.admin_token:
+        # Without a configured token the endpoints do not exist
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    
+    supplied = credentials.credentials if credentials else ""
+    if not hmac.compare_digest(supplied.encode("utf-8"), settings.admin_token.encode("utf-8")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
@@ -1,10 +1,23 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from collections import OrderedDict
+import hashlib
 import os
+import threading
+import time
+from app.cache import CACHE_EVICTIONS, CACHE_REQUESTS
+from app.metrics import REGISTRY
+from app.tokens import KeySet, TokenCodec, TokenError, TokenExpired, get_codec
+from app.tracing import span
 
-# Read secret from environment or settings
-def get_auth_secret():
+AUTH_ATTEMPTS = REGISTRY.counter(
+    "auth_attempts_total",
+    "Login, registration and bearer-token checks by outcome",
+    ("action", "outcome"),
+)
+
+def resolve_auth_secret() -> str:
+    """Read the signing secret from the environment, falling back to settings"""
     # Try environment variable first (for Vercel)
     secret = os.getenv("BETTER_AUTH_SECRET")
     if secret:
@@ -20,40 +33,160 @@ def get_auth_secret():
     
     return ""
 
+def resolve_auth_keys() -> KeySet:
+    """AUTH_KEYS (kid=secret pairs, first one signing) plus BETTER_AUTH_SECRET for tokens without a kid"""
+    try:
+        from app.config import settings
+        spec = settings.auth_keys
+    except Exception:
+        spec = os.getenv("AUTH_KEYS", "")
+    return KeySet.parse(spec, default=resolve_auth_secret())
+
+def resolve_token_codec() -> TokenCodec:
+    """The AUTH_TOKEN_CODEC codec; raises ValueError if it is unknown or its library is missing"""
+    from app.config import settings
+    return get_codec(settings.auth_token_codec)
+
+# Resolved on first use and then kept; reload_auth_keys() picks up new ones
+_auth_keys: KeySet | None = None
+_token_codec: TokenCodec | None = None
+
+def get_auth_keys() -> KeySet:
+    global _auth_keys
+    if not _auth_keys:
+        # An empty key set is not cached, so configuring keys later still takes effect
+        _auth_keys = resolve_auth_keys()
+    return _auth_keys
+
+def get_token_codec() -> TokenCodec:
+    global _token_codec
+    if _token_codec is None:
+        _token_codec = resolve_token_codec()
+    return _token_codec
+
+def reload_auth_keys() -> KeySet:
+    """Re-read keys and codec after a change; tokens verified under the old keys are forgotten"""
+    global _auth_keys, _token_codec
+    _auth_keys = None
+    _token_codec = None
+    verified_tokens.clear()
+    return get_auth_keys()
+
+class VerifiedTokenCache:
+    """Bounded LRU of tokens whose signature and claims have been checked.
+    
+    Keys are SHA-256 digests, so bearer tokens are never held in memory, and
+    each entry expires at its token's `exp`. Entries remember the key set
+    (by fingerprint) they were verified with; a different one empties the cache.
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        # digest -> (exp as a Unix timestamp, user_id), least recently used first
+        self._entries: OrderedDict[bytes, tuple[float, int]] = OrderedDict()
+        self._keys = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+    
+    def get(self, digest: bytes, keys: str) -> int | None:
+        with self._lock:
+            if keys != self._keys:
+                self._entries.clear()
+                self._keys = keys
+                return None
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[digest]
+                CACHE_EVICTIONS.inc(reason="expired")
+                return None
+            self._entries.move_to_end(digest)
+            return entry[1]
+    
+    def set(self, digest: bytes, keys: str, exp: float, user_id: int) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if keys != self._keys:
+                return
+            self._entries[digest] = (exp, user_id)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.inc(reason="capacity")
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def size(self) -> int:
+        return len(self._entries)
+
+def _token_cache_size() -> int:
+    try:
+        from app.config import settings
+        return settings.auth_token_cache_size
+    except Exception:
+        return 4096
+
+verified_tokens = VerifiedTokenCache(_token_cache_size())
+
 security = HTTPBearer()
 
-def get_current_user_id(
+async def get_current_user_id(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> int:
-    """Validates JWT and extracts user_id. Skills: secure-jwt-guard.md"""
+    """Validates JWT and extracts user_id. Skills: secure-jwt-guard.md
+    
+    A repeat of a token that already verified is answered from
+    verified_tokens without decoding it again. Both paths are cheap CPU
+    work, so this runs on the event loop instead of the threadpool.
+    """
     token = credentials.credentials
-    secret = get_auth_secret()
+    keys = get_auth_keys()
     
-    if not secret:
+    if not keys:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Server configuration error: BETTER_AUTH_SECRET not set"
         )
     
+    digest = verified_tokens.digest(token)
+    user_id = verified_tokens.get(digest, keys.fingerprint)
+    if user_id is not None:
+        CACHE_REQUESTS.inc(namespace="jwt", result="hit")
+        AUTH_ATTEMPTS.inc(action="token", outcome="ok")
+        return user_id
+    CACHE_REQUESTS.inc(namespace="jwt", result="miss")
+    
     try:
-        payload = jwt.decode(
-            token, 
-            secret, 
-            algorithms=["HS256"]
-        )
+        codec = get_token_codec()
+        with span("auth.jwt_decode", codec=codec.name):
+            payload = codec.decode(token, keys)
         user_id: int = payload.get("user_id")
         
         if user_id is None:
+            AUTH_ATTEMPTS.inc(action="token", outcome="missing_claim")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token: missing user_id claim"
             )
         
+        # Tokens without exp never expire on their own, so only cache those that do
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            verified_tokens.set(digest, keys.fingerprint, exp, user_id)
+        AUTH_ATTEMPTS.inc(action="token", outcome="ok")
         return user_id
     
-    except JWTError:
+    except TokenError as e:
+        outcome = "expired" if isinstance(e, TokenExpired) else "invalid"
+        AUTH_ATTEMPTS.inc(action="token", outcome=outcome)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
-
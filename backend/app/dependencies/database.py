@@ -1,88 +1,385 @@
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from fastapi import Depends
+from app.cache import cache
 from app.config import settings
+from app.dependencies.auth import get_current_user_id
+from app.db_telemetry import instrument_engine
 import os
-import sys
+import time
+import uuid
+from app.log import get_logger
+from app.tracing import span
 
-# Create engine lazily to avoid connection errors at import time
+log = get_logger("app.database")
+
+# Create engines lazily to avoid connection errors at import time
 _engine = None
+_async_engine = None
+_read_engine = None
+_async_read_engine = None
+
+def use_async_engine() -> bool:
+    """DATABASE_ASYNC=true switches the route layer to the asyncpg engine"""
+    value = os.getenv("DATABASE_ASYNC")
+    if value is not None:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    try:
+        return bool(settings.database_async)
+    except Exception:
+        return False
+
+def get_database_url() -> str:
+    """Resolve DATABASE_URL and enforce PostgreSQL"""
+    # Get DATABASE_URL from settings (which reads from .env file or environment variables)
+    # Priority: environment variable > .env file > empty string
+    # os.getenv() checks actual environment variables (takes precedence)
+    # settings.database_url reads from .env file if env var not set
+    try:
+        db_url = os.getenv("DATABASE_URL") or (settings.database_url if settings else "")
+    except Exception as e:
+        log.warning("error reading settings", error=str(e))
+        db_url = os.getenv("DATABASE_URL", "")
+
+    if not db_url:
+        error_msg = "DATABASE_URL environment variable is not set"
+        log.error(error_msg, checked=["os.getenv('DATABASE_URL')", "settings.database_url"])
+        raise ValueError(error_msg)
+
+    # Enforce PostgreSQL only - no SQLite support
+    if not db_url.startswith(("postgresql://", "postgres://")):
+        error_msg = f"Only PostgreSQL databases are supported. Current DATABASE_URL starts with: {db_url[:20]}..."
+        log.error(error_msg)
+        raise ValueError("DATABASE_URL must be a PostgreSQL connection string (postgresql://...)")
+
+    return db_url
+
+def get_read_database_url() -> str:
+    """Resolve the optional DATABASE_READ_URL (a read replica); empty when unset"""
+    db_url = os.getenv("DATABASE_READ_URL") or settings.database_read_url
+    if db_url and not db_url.startswith(("postgresql://", "postgres://")):
+        raise ValueError("DATABASE_READ_URL must be a PostgreSQL connection string (postgresql://...)")
+    return db_url
+
+# Pool shapes per deployment; DATABASE_POOL_PROFILE selects one
+POOL_PROFILES = {
+    # One request per invocation: a single connection, recycled before Neon
+    # suspends idle compute
+    "serverless": {"pool_size": 1, "max_overflow": 0, "pool_timeout": 10, "pool_recycle": 300},
+    # Long-running uvicorn worker: enough connections for concurrent requests
+    # in the threadpool or on the event loop
+    "server": {"pool_size": 10, "max_overflow": 10, "pool_timeout": 30, "pool_recycle": 1800},
+    # No pooling: every checkout is a fresh connection, closed on release
+    "test": {},
+}
+
+def pool_profile() -> str:
+    profile = (settings.database_pool_profile or "").strip().lower()
+    if not profile:
+        profile = "serverless" if os.getenv("VERCEL") == "1" or os.getenv("VERCEL_ENV") else "server"
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"DATABASE_POOL_PROFILE must be one of {', '.join(POOL_PROFILES)}, not {profile!r}")
+    return profile
+
+def pool_options() -> dict:
+    """create_engine pool arguments for the active profile plus DATABASE_POOL_* overrides"""
+    profile = pool_profile()
+    if profile == "test":
+        return {"poolclass": NullPool}
+    options = dict(POOL_PROFILES[profile])
+    overrides = {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+    }
+    options.update({name: value for name, value in overrides.items() if value is not None})
+    return options
+
+def uses_pgbouncer(db_url: str) -> bool:
+    """Transaction-mode PgBouncer hands each transaction a different server
+    connection, so nothing may outlive a transaction on the server side"""
+    if settings.database_pgbouncer is not None:
+        return settings.database_pgbouncer
+    return "-pooler." in (make_url(db_url).host or "")
+
+def build_engine(db_url: str):
+    # pool_pre_ping=True ensures connections are validated before use.
+    # psycopg2 never creates server-side prepared statements and the app sets
+    # no session state, so it is safe behind PgBouncer as is
+    engine = create_engine(
+        db_url,
+        echo=False,
+        pool_pre_ping=True,
+        **pool_options(),
+        connect_args={
+            "connect_timeout": settings.database_connect_timeout,
+            "sslmode": "require"
+        }
+    )
+    instrument_engine(engine)
+    return engine
 
 def get_engine():
     global _engine
     if _engine is None:
-        # Get DATABASE_URL from settings (which reads from .env file or environment variables)
-        # Priority: environment variable > .env file > empty string
-        # os.getenv() checks actual environment variables (takes precedence)
-        # settings.database_url reads from .env file if env var not set
+        db_url = get_database_url()
+
         try:
-            db_url = os.getenv("DATABASE_URL") or (settings.database_url if settings else "")
+            _engine = build_engine(db_url)
+            log.info("database engine created", pool_profile=pool_profile())
         except Exception as e:
-            print(f"⚠️ Error reading settings: {e}", file=sys.stderr, flush=True)
-            db_url = os.getenv("DATABASE_URL", "")
-        
-        if not db_url:
-            error_msg = "DATABASE_URL environment variable is not set"
-            print(f"❌ {error_msg}", file=sys.stderr, flush=True)
-            print(f"   Checked os.getenv('DATABASE_URL'): {os.getenv('DATABASE_URL')}", file=sys.stderr, flush=True)
-            if settings:
-                print(f"   Checked settings.database_url: {settings.database_url}", file=sys.stderr, flush=True)
-            raise ValueError(error_msg)
-        
-        # Enforce PostgreSQL only - no SQLite support
-        if not db_url.startswith(("postgresql://", "postgres://")):
-            error_msg = f"Only PostgreSQL databases are supported. Current DATABASE_URL starts with: {db_url[:20]}..."
-            print(f"❌ {error_msg}", file=sys.stderr, flush=True)
-            raise ValueError("DATABASE_URL must be a PostgreSQL connection string (postgresql://...)")
-        
+            log.error("failed to create database engine", error=str(e))
+            raise
+
+    return _engine
+
+def to_async_url(db_url: str):
+    """Point a postgresql:// URL at the asyncpg driver.
+
+    asyncpg does not understand libpq query options such as sslmode or
+    channel_binding (Neon adds both), so they are dropped here and SSL is
+    requested through connect_args instead.
+    """
+    url = make_url(db_url)
+    return url.set(drivername="postgresql+asyncpg").difference_update_query(
+        ["sslmode", "channel_binding", "connect_timeout"]
+    )
+
+def build_async_engine(db_url: str):
+    # Same pool shape as build_engine(); asyncpg names its options differently
+    url = to_async_url(db_url)
+    connect_args = {
+        "timeout": settings.database_connect_timeout,
+        "ssl": "require"
+    }
+    if uses_pgbouncer(db_url):
+        # asyncpg prepares every statement and caches them per connection. Behind
+        # transaction pooling the next transaction may run on another server
+        # connection, so disable both caches and give each statement a unique name
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    engine = create_async_engine(
+        url,
+        echo=False,
+        pool_pre_ping=True,
+        **pool_options(),
+        connect_args=connect_args
+    )
+    instrument_engine(engine)
+    return engine
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        db_url = get_database_url()
+
         try:
-            # For serverless, use connection pooling with appropriate settings
-            # pool_pre_ping=True ensures connections are validated before use
-            # pool_size and max_overflow set to 1 for serverless (single connection)
-            _engine = create_engine(
-                db_url, 
-                echo=False, 
-                pool_pre_ping=True,
-                pool_size=1,
-                max_overflow=0,
-                pool_recycle=300,  # Recycle connections after 5 minutes
-                connect_args={
-                    "connect_timeout": 10,  # 10 second connection timeout
-                    "sslmode": "require"
-                }
-            )
-            print("✅ Database engine created", file=sys.stderr, flush=True)
+            _async_engine = build_async_engine(db_url)
+            log.info("async database engine created", pool_profile=pool_profile())
         except Exception as e:
-            error_msg = f"Failed to create database engine: {str(e)}"
-            print(f"❌ {error_msg}", file=sys.stderr, flush=True)
+            log.error("failed to create async database engine", error=str(e))
             raise
-    
-    return _engine
 
-def get_db_session():
+    return _async_engine
+
+def get_read_engine():
+    global _read_engine
+    if _read_engine is None:
+        _read_engine = build_engine(get_read_database_url())
+        log.info("read replica engine created")
+    return _read_engine
+
+def get_async_read_engine():
+    global _async_read_engine
+    if _async_read_engine is None:
+        _async_read_engine = build_async_engine(get_read_database_url())
+        log.info("async read replica engine created")
+    return _async_read_engine
+
+class ThreadedSession:
+    """Awaitable facade over a synchronous Session.
+
+    Routes are written against the AsyncSession API. In sync mode every call
+    that can touch the network runs in the threadpool, so a slow psycopg2
+    query no longer blocks the event loop. Calls are awaited one at a time,
+    so the underlying Session is never used from two threads at once.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    def get_bind(self):
+        return self.sync_session.get_bind()
+
+    async def exec(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.exec, *args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def connection(self):
+        return await run_in_threadpool(self.sync_session.connection)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+# What route handlers receive from get_db_session
+DbSession = AsyncSession | ThreadedSession
+
+def report_session_error(e: Exception) -> None:
+    log.error("database session error", exc_info=e)
+
+@asynccontextmanager
+async def background_session(app):
+    """Session for work that runs after the response (BackgroundTasks).
+
+    The request's session is closed by then, so this opens a new one through
+    get_db_session, honouring app.dependency_overrides.
+    """
+    sessions = app.dependency_overrides.get(get_db_session, get_db_session)()
+    session = await sessions.__anext__()
+    try:
+        yield session
+    finally:
+        await sessions.aclose()
+
+async def get_db_session():
     """Get database session with error handling for PostgreSQL database
-    
+
+    Yields an AsyncSession when DATABASE_ASYNC is enabled, otherwise a
+    ThreadedSession over the psycopg2 engine; both are used with await.
     Routes should explicitly call session.commit() to save changes.
     This function ensures proper rollback on errors and session cleanup.
     """
-    engine = get_engine()
-    session = Session(engine)
+    if use_async_engine():
+        session = AsyncSession(get_async_engine())
+    else:
+        session = ThreadedSession(Session(get_engine()))
     try:
         yield session
     except Exception as e:
         # Rollback on any error to ensure data consistency
         try:
-            session.rollback()
+            await session.rollback()
         except Exception:
             pass  # Ignore rollback errors if session is already closed
-        error_msg = f"Database session error: {str(e)}"
-        print(f"❌ {error_msg}", file=sys.stderr, flush=True)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        report_session_error(e)
         # Re-raise to let FastAPI handle it properly
         raise
     finally:
         # Always close the session to release connection back to pool
         try:
-            session.close()
+            with span("db.session_close"):
+                await session.close()
         except Exception:
             pass  # Ignore close errors
 
+# Read-your-writes: after a write the user's reads stay on the primary for
+# READ_YOUR_WRITES_SECONDS, longer than the replica is expected to lag.
+# Pins live in process and, when the cache is shared, in the cache so that
+# every instance honours them.
+_pinned_until: dict[int, float] = {}
+# After a failed replica connection, reads use the primary until this time
+_replica_down_until = 0.0
+
+async def pin_to_primary(user_id: int) -> None:
+    """Route the user's reads to the primary for the read-your-writes window"""
+    window = settings.read_your_writes_seconds
+    now = time.monotonic()
+    if len(_pinned_until) > 10000:
+        for pinned_user, until in list(_pinned_until.items()):
+            if until <= now:
+                del _pinned_until[pinned_user]
+    _pinned_until[user_id] = now + window
+    if cache.shared:
+        await cache.set("pin", str(user_id), b"1", ttl=window)
+
+async def pinned_to_primary(user_id: int) -> bool:
+    if _pinned_until.get(user_id, 0.0) > time.monotonic():
+        return True
+    return cache.shared and await cache.get("pin", str(user_id)) is not None
+
+def open_read_session():
+    """A session on the read replica, in the same mode as get_db_session"""
+    if use_async_engine():
+        return AsyncSession(get_async_read_engine())
+    return ThreadedSession(Session(get_read_engine()))
+
+async def get_read_db_session(
+    authenticated_user_id: int = Depends(get_current_user_id),
+    primary: DbSession = Depends(get_db_session)
+):
+    """Session for read-only routes: the replica when DATABASE_READ_URL is set.
+
+    Falls back to the primary session when no replica is configured, when
+    the user wrote within the read-your-writes window, or when the replica
+    cannot be reached (it is then skipped for REPLICA_RETRY_SECONDS). The
+    primary session only connects if it is actually used.
+    """
+    global _replica_down_until
+    if (
+        not get_read_database_url()
+        or time.monotonic() < _replica_down_until
+        or await pinned_to_primary(authenticated_user_id)
+    ):
+        yield primary
+        return
+
+    session = open_read_session()
+    try:
+        # Connect up front so an unreachable replica falls back before the route runs
+        with span("db.replica_connect"):
+            await session.connection()
+    except Exception as e:
+        log.warning("read replica unavailable, using primary", error=str(e))
+        _replica_down_until = time.monotonic() + settings.replica_retry_seconds
+        try:
+            await session.close()
+        except Exception:
+            pass
+        yield primary
+        return
+    try:
+        yield session
+    finally:
+        try:
+            await session.close()
+        except Exception:
+            pass  # Ignore close errors
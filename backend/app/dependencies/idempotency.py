@@ -0,0 +1,123 @@
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+import hashlib
+from app.config import settings
+from app.models import IdempotencyKey
+from app.dependencies.auth import get_current_user_id
+from app.dependencies.database import DbSession, get_db_session
+from app.tracing import span
+
+MAX_KEY_LENGTH = 255
+
+# (user_id, key) pairs being processed in this process; a concurrent retry gets 409
+_in_flight: set[tuple[int, str]] = set()
+
+class Idempotency:
+    """Idempotency-Key state for one write request.
+    
+    Routes return `replay` when it is set. Otherwise they call record() before
+    commit, so the response is stored in the same transaction as the write,
+    and commit through commit() so a duplicate that committed first is
+    replayed instead of surfacing as an integrity error.
+    """
+    
+    def __init__(self, user_id: int, key: str | None = None, request_hash: str | None = None):
+        self.user_id = user_id
+        self.key = key
+        self.request_hash = request_hash
+        self.stored: IdempotencyKey | None = None  # expired row to overwrite
+        self.replay: Response | None = None
+    
+    def replay_of(self, stored: IdempotencyKey) -> Response:
+        if stored.request_hash != self.request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        return Response(
+            content=stored.response_body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+    
+    async def record(self, session: DbSession, status_code: int, body: str) -> None:
+        """Stage the response for this key in the current transaction"""
+        if self.key is None:
+            return
+        now = datetime.utcnow()
+        # Keep storage bounded: each new key purges the user's expired ones
+        await session.exec(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == self.user_id,
+                IdempotencyKey.expires_at <= now,
+                IdempotencyKey.key != self.key,
+            )
+        )
+        row = self.stored or IdempotencyKey(user_id=self.user_id, key=self.key)
+        row.request_hash = self.request_hash
+        row.status_code = status_code
+        row.response_body = body
+        row.created_at = now
+        row.expires_at = now + timedelta(seconds=settings.idempotency_ttl_seconds)
+        session.add(row)
+    
+    async def commit(self, session: DbSession) -> Response | None:
+        """Commit the write; returns the winner's response if a duplicate got there first"""
+        try:
+            await session.commit()
+        except IntegrityError:
+            if self.key is None:
+                raise
+            await session.rollback()
+            stored = await session.get(IdempotencyKey, (self.user_id, self.key))
+            if stored is None:
+                raise
+            return self.replay_of(stored)
+        return None
+
+async def get_idempotency(
+    request: Request,
+    authenticated_user_id: int = Depends(get_current_user_id),
+    session: DbSession = Depends(get_db_session)
+):
+    """Resolve the Idempotency-Key header; requests without one pass through unchanged"""
+    key = request.headers.get("idempotency-key")
+    if key is None:
+        yield Idempotency(authenticated_user_id)
+        return
+    
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+        )
+    
+    # A retry must be the same call: method, path (which carries user_id) and body
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"{request.method} {request.url.path}\n".encode("utf-8"))
+    fingerprint.update(await request.body())
+    state = Idempotency(authenticated_user_id, key, fingerprint.hexdigest())
+    
+    with span("idempotency.lookup"):
+        stored = await session.get(IdempotencyKey, (authenticated_user_id, key))
+    if stored is not None and stored.expires_at > datetime.utcnow():
+        state.replay = state.replay_of(stored)
+        yield state
+        return
+    state.stored = stored
+    
+    in_flight = (authenticated_user_id, key)
+    if in_flight in _in_flight:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is already in progress"
+        )
+    _in_flight.add(in_flight)
+    try:
+        yield state
+    finally:
+        _in_flight.discard(in_flight)
@@ -0,0 +1,170 @@
+# Structured JSON logging: levels, per-route sampling and a background writer
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+import orjson
+from app.metrics import REGISTRY, route_template
+
+LOGS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total",
+    "Log records dropped because the background writer's queue was full",
+)
+
+# Attributes every LogRecord has; anything else on a record is a structured field
+RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, fields and any traceback"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+class Logger(logging.LoggerAdapter):
+    """Logger taking structured fields as keyword arguments:
+        
+        log.info("login failed", email=email, reason="bad_password")
+    
+    Fields are only gathered when the level is enabled, so pass values
+    rather than pre-formatted f-strings and a disabled debug call costs
+    one level check.
+    """
+    
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in ("exc_info", "stack_info", "stacklevel")}
+        kwargs["extra"] = fields
+        return msg, kwargs
+
+def get_logger(name: str) -> Logger:
+    return Logger(logging.getLogger(name), {})
+
+class BackgroundHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread without blocking the caller.
+    
+    The message is rendered here so it reflects the values at call time, but
+    tracebacks are formatted by the writer thread. When the queue is full
+    the record is dropped and counted rather than making the request wait.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOGS_DROPPED.inc()
+
+_listener: logging.handlers.QueueListener | None = None
+
+def configure_logging(level: str = "INFO", background: bool = True, queue_size: int = 10000, stream=None) -> None:
+    """Route the "app" logger hierarchy to JSON lines on stderr; safe to call again"""
+    global _listener
+    stop_logging()
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(JsonFormatter())
+    handler = writer
+    if background:
+        records = queue.Queue(maxsize=queue_size)
+        handler = BackgroundHandler(records)
+        _listener = logging.handlers.QueueListener(records, writer)
+        _listener.start()
+    root = logging.getLogger("app")
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    root.propagate = False
+
+def flush_logs(timeout: float = 2.0) -> None:
+    """Wait until the writer thread has written everything queued so far"""
+    if _listener is None:
+        return
+    records = _listener.queue
+    deadline = time.monotonic() + timeout
+    while records.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+def stop_logging() -> None:
+    """Drain the queue and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        # Make room for the stop sentinel, which is enqueued without waiting
+        flush_logs()
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """'/api/health=0.01, /api/{user_id}/tasks=0.1' -> {route template: rate}"""
+    rates = {}
+    for item in spec.split(","):
+        route, _, rate = item.strip().rpartition("=")
+        if route:
+            rates[route.strip()] = float(rate)
+    return rates
+
+access_log = get_logger("app.access")
+
+class AccessLogMiddleware:
+    """Pure ASGI middleware writing one line per request.
+    
+    Lines are sampled per route template: `sample_rate` applies to every
+    route not listed in `route_rates`. Server errors and requests slower
+    than `slow_seconds` are always logged, whatever the rate.
+    """
+    
+    def __init__(self, app, sample_rate: float = 1.0, route_rates: dict[str, float] | None = None,
+                 slow_seconds: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.route_rates = route_rates or {}
+        self.slow_seconds = slow_seconds
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not access_log.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            route = route_template(scope)
+            rate = self.route_rates.get(route, self.sample_rate)
+            if status >= 500 or duration >= self.slow_seconds or (rate > 0 and random.random() < rate):
+                access_log.info(
+                    "request",
+                    method=scope["method"],
+                    path=scope["path"],
+                    route=route,
+                    status=status,
+                    duration_ms=round(duration * 1000, 1),
+                    sample_rate=rate,
+                )
@@ -0,0 +1,159 @@
+# Event-loop lag sampling and blocking-call detection (opt-in: LOOP_MONITOR=true)
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends
+from app.dependencies.admin import require_admin
+from app.metrics import REGISTRY, route_template
+
+LOOP_LAG = REGISTRY.histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a timer was due and when the event loop ran it",
+)
+LOOP_BLOCKED = REGISTRY.counter(
+    "event_loop_blocked_total",
+    "Event loop stalls longer than the blocking threshold",
+    ("route",),
+)
+LOOP_BLOCKED_SECONDS = REGISTRY.histogram(
+    "event_loop_blocked_seconds",
+    "Duration of event loop stalls longer than the blocking threshold",
+    ("route",),
+)
+
+# Innermost frames kept from the stack of a blocked loop
+STACK_DEPTH = 25
+
+class LoopMonitor:
+    """Samples event-loop lag and reports whatever is holding the loop.
+
+    A timer task on the loop ticks every `interval` seconds and records how
+    late each tick fired. A watchdog thread notices when ticks stop for more
+    than `threshold` seconds and captures the loop thread's stack and the
+    route of the request task that is running at that moment.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, max_events: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.events = deque(maxlen=max_events)
+        self.loop = None
+        self._loop_thread_id = None
+        self._last_tick = 0.0
+        self._generation = 0
+        self._stall = None
+        # asyncio.Task -> ASGI scope of the request it is serving
+        self._task_scopes = {}
+
+    def ensure_started(self) -> None:
+        """Start sampling on the running loop (restarts if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+        self._generation += 1
+        self.loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stall = None
+        loop.create_task(self._sample(self._generation))
+        threading.Thread(
+            target=self._watch, args=(self._generation,), name="loop-monitor", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        self._generation += 1
+        self.loop = None
+
+    def track(self, scope: dict) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_scopes[task] = scope
+
+    def untrack(self) -> None:
+        self._task_scopes.pop(asyncio.current_task(), None)
+
+    async def _sample(self, generation: int) -> None:
+        while generation == self._generation:
+            due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            LOOP_LAG.observe(max(0.0, now - due))
+            self._last_tick = now
+
+    def _watch(self, generation: int) -> None:
+        poll = max(self.interval / 2, 0.005)
+        while generation == self._generation:
+            time.sleep(poll)
+            last_tick = self._last_tick
+            blocked_since = last_tick + self.interval
+            if time.monotonic() - blocked_since > self.threshold:
+                if self._stall is None or self._stall["since"] != blocked_since:
+                    self._stall = self._capture(blocked_since)
+            elif self._stall is not None:
+                self._finish(self._stall, last_tick)
+                self._stall = None
+            if self.loop is None or self.loop.is_closed():
+                return
+
+    def _capture(self, blocked_since: float) -> dict:
+        """Runs on the watchdog thread while the loop is stuck"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame)[-STACK_DEPTH:] if frame is not None else []
+        task = asyncio.current_task(self.loop) if self.loop is not None else None
+        scope = self._task_scopes.get(task) or {}
+        event = {
+            "route": route_template(scope) if scope else "none",
+            "method": scope.get("method"),
+            "task": task.get_name() if task is not None else None,
+            "detected_at": datetime.now(timezone.utc).isoformat(),
+            "blocked_ms": None,
+            "stack": [line.rstrip("\n") for line in stack],
+        }
+        self.events.append(event)
+        return {"since": blocked_since, "event": event}
+
+    def _finish(self, stall: dict, resumed_at: float) -> None:
+        duration = max(0.0, resumed_at - stall["since"])
+        event = stall["event"]
+        event["blocked_ms"] = round(duration * 1000, 1)
+        LOOP_BLOCKED.inc(route=event["route"])
+        LOOP_BLOCKED_SECONDS.observe(duration, route=event["route"])
+
+    def report(self) -> dict:
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "metrics": REGISTRY.snapshot("event_loop_"),
+            "recent_blocks": list(self.events),
+        }
+
+class LoopMonitorMiddleware:
+    """Pure ASGI middleware: starts the monitor and maps request tasks to scopes"""
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.monitor.ensure_started()
+        self.monitor.track(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.untrack()
+
+monitor = LoopMonitor()
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/api/debug/event-loop")
+async def event_loop_report():
+    """Event-loop lag histogram, stall counters and the most recent stalls with stacks"""
+    return monitor.report()
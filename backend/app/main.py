@@ -3,10 +3,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 import os
-import sys
-import traceback
+from app.config import settings  # configures logging from LOG_* settings
+from app.log import get_logger
+from app.responses import FastJSONResponse
 
-app = FastAPI(title="Evolution of Todo API", version="1.0.0")
+log = get_logger("app.main")
+
+app = FastAPI(
+    title="Evolution of Todo API",
+    version="1.0.0",
+    default_response_class=FastJSONResponse
+)
 
 # TASK-013: CORS Configuration - MUST be configured FIRST
 # Read directly from environment (Vercel provides these)
@@ -57,19 +64,15 @@ try:
         if is_vercel:
             # In Vercel production, allow all origins as fallback
             # But log a warning that CORS_ORIGINS should be set
-            print("⚠️ Warning: CORS_ORIGINS not set in Vercel. Allowing all origins as fallback.", file=sys.stderr, flush=True)
-            print("⚠️ For better security, set CORS_ORIGINS in Vercel environment variables.", file=sys.stderr, flush=True)
+            log.warning("CORS_ORIGINS not set in Vercel, allowing all origins as fallback; set it for better security")
             origins = ["*"]
         else:
             # In local development, default to localhost
             origins = ["http://localhost:3000", "http://127.0.0.1:3000", "*"]
     
-    print(f"✅ CORS origins configured: {origins}", file=sys.stderr, flush=True)
-    print(f"✅ Vercel environment: {is_vercel}", file=sys.stderr, flush=True)
+    log.info("CORS origins configured", origins=origins, vercel=bool(is_vercel))
 except Exception as e:
-    print(f"Warning: CORS config error: {e}", file=sys.stderr, flush=True)
-    import traceback
-    traceback.print_exc(file=sys.stderr)
+    log.warning("CORS config error", exc_info=e)
     # Default to allow all origins as fallback
     origins = ["*"]
 
@@ -88,7 +91,7 @@ try:
             expose_headers=["*"],
             max_age=3600,  # Cache preflight requests for 1 hour
         )
-        print("✅ CORS middleware added (allow all origins)", file=sys.stderr, flush=True)
+        log.info("CORS middleware added", mode="allow all origins")
     else:
         # Specific origins - can use credentials
         app.add_middleware(
@@ -100,11 +103,9 @@ try:
             expose_headers=["*"],
             max_age=3600,  # Cache preflight requests for 1 hour
         )
-        print("✅ CORS middleware added (specific origins)", file=sys.stderr, flush=True)
+        log.info("CORS middleware added", mode="specific origins")
 except Exception as e:
-    print(f"❌ CORS middleware error: {e}", file=sys.stderr, flush=True)
-    import traceback
-    traceback.print_exc(file=sys.stderr)
+    log.error("CORS middleware error", exc_info=e)
     # Try to add with minimal config as fallback
     try:
         app.add_middleware(
@@ -114,9 +115,92 @@ except Exception as e:
             allow_methods=["*"],
             allow_headers=["*"],
         )
-        print("✅ CORS middleware added (fallback config)", file=sys.stderr, flush=True)
+        log.info("CORS middleware added", mode="fallback config")
     except Exception as fallback_error:
-        print(f"❌ Failed to add CORS middleware even with fallback: {fallback_error}", file=sys.stderr, flush=True)
+        log.error("failed to add CORS middleware even with fallback", error=str(fallback_error))
+
+# Response compression above a size threshold (COMPRESSION_ENABLED=false to disable)
+try:
+    from app.config import settings
+    if settings.compression_enabled:
+        from app.compression import CompressionMiddleware, available_encodings
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_min_size,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+            zstd_level=settings.compression_zstd_level,
+        )
+        log.info("compression enabled", encodings=available_encodings(), min_size=settings.compression_min_size)
+except Exception as e:
+    log.error("compression middleware error", exc_info=e)
+
+# Database pool/query telemetry: Server-Timing per request, aggregates at /api/debug/db
+try:
+    from app.config import settings
+    if settings.db_telemetry:
+        from app import db_telemetry
+        app.add_middleware(db_telemetry.DbTelemetryMiddleware, server_timing=settings.server_timing)
+        app.include_router(db_telemetry.router)
+        log.info("database telemetry enabled")
+except Exception as e:
+    log.error("database telemetry error", exc_info=e)
+
+# Opt-in event-loop lag monitor (LOOP_MONITOR=true): flags handlers that hold the loop
+try:
+    from app.config import settings
+    if settings.loop_monitor:
+        from app import loop_monitor
+        loop_monitor.monitor.interval = settings.loop_monitor_interval_ms / 1000
+        loop_monitor.monitor.threshold = settings.loop_monitor_threshold_ms / 1000
+        app.add_middleware(loop_monitor.LoopMonitorMiddleware, monitor=loop_monitor.monitor)
+        app.include_router(loop_monitor.router)
+        log.info("event-loop monitor enabled", threshold_ms=settings.loop_monitor_threshold_ms)
+except Exception as e:
+    log.error("event-loop monitor error", exc_info=e)
+
+# One JSON access-log line per request, sampled per route (LOG_SAMPLE_RATE, LOG_SAMPLE_ROUTES)
+try:
+    from app.config import settings
+    from app.log import AccessLogMiddleware, parse_sample_rates
+    app.add_middleware(
+        AccessLogMiddleware,
+        sample_rate=settings.log_sample_rate,
+        route_rates=parse_sample_rates(settings.log_sample_routes),
+        slow_seconds=settings.log_slow_ms / 1000,
+    )
+except Exception as e:
+    log.error("access log error", exc_info=e)
+
+# Request count/latency/in-flight metrics by route, scraped at /metrics (needs ADMIN_TOKEN).
+# Tracing is added after this and wraps it, so the histograms time everything
+# inside the tracing middleware but not tracing's own overhead
+try:
+    from app.config import settings
+    if settings.request_metrics:
+        from app import request_metrics
+        app.add_middleware(request_metrics.RequestMetricsMiddleware)
+        app.include_router(request_metrics.router)
+        log.info("request metrics enabled", metrics_endpoint="protected by ADMIN_TOKEN" if settings.admin_token else "disabled: ADMIN_TOKEN not set")
+except Exception as e:
+    log.error("request metrics error", exc_info=e)
+
+# Tracing with W3C traceparent propagation; outermost, so the root span covers the whole stack
+try:
+    from app.config import settings
+    if settings.tracing_enabled:
+        from app import tracing
+        tracing.configure_tracing(settings.tracing_sample_rate, settings.tracing_max_traces, settings.tracing_file)
+        app.add_middleware(tracing.TracingMiddleware, tracer=tracing.tracer)
+        app.include_router(tracing.router)
+        log.info("tracing enabled", sample_rate=settings.tracing_sample_rate, file=settings.tracing_file or None)
+except Exception as e:
+    log.error("tracing error", exc_info=e)
+
+# Resolve the token codec now: a misspelled AUTH_TOKEN_CODEC or a codec whose
+# library is not installed stops startup instead of surfacing on the first login
+from app.dependencies.auth import get_token_codec
+log.info("token codec", codec=get_token_codec().name)
 
 # Add explicit OPTIONS handler for all routes (backup for CORS preflight)
 @app.options("/{full_path:path}")
@@ -155,7 +239,6 @@ async def options_handler(full_path: str, request: Request):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTPException with CORS headers"""
-    import sys
     origin = request.headers.get("origin", "*")
     
     # Determine allowed origin
@@ -176,7 +259,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     # Ensure detail is a string
     detail = str(exc.detail) if exc.detail else "An error occurred"
     
-    print(f"⚠️ HTTPException: {exc.status_code} - {detail}", file=sys.stderr, flush=True)
+    log.debug("HTTPException", status=exc.status_code, detail=detail)
     
     return JSONResponse(
         status_code=exc.status_code,
@@ -226,9 +309,8 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 async def global_exception_handler(request: Request, exc: Exception):
     """Catch all unhandled exceptions and return proper error response with CORS headers"""
     error_msg = str(exc)
-    error_trace = traceback.format_exc()
-    print(f"❌ Unhandled exception: {error_msg}", file=sys.stderr, flush=True)
-    print(f"Traceback: {error_trace}", file=sys.stderr, flush=True)
+    # The traceback is formatted by the log writer thread, not here
+    log.error("unhandled exception", path=request.url.path, exc_info=exc)
     
     # Get origin from request for CORS
     origin = request.headers.get("origin", "*")
@@ -282,29 +364,23 @@ async def root():
 try:
     from app.routes import health
     app.include_router(health.router, prefix="/api")
-    print("✅ Health router loaded", file=sys.stderr, flush=True)
+    log.info("router loaded", router="health")
 except Exception as e:
-    print(f"❌ Error loading health router: {e}", file=sys.stderr, flush=True)
-    import traceback
-    traceback.print_exc(file=sys.stderr)
+    log.error("error loading router", router="health", exc_info=e)
 
 # Other routers (may need database)
 try:
     from app.routes import auth
     app.include_router(auth.router)
-    print("✅ Auth router loaded", file=sys.stderr, flush=True)
+    log.info("router loaded", router="auth")
 except Exception as e:
-    print(f"❌ Error loading auth router: {e}", file=sys.stderr, flush=True)
-    import traceback
-    traceback.print_exc(file=sys.stderr)
+    log.error("error loading router", router="auth", exc_info=e)
 
 try:
     from app.routes import tasks
     app.include_router(tasks.router)
-    print("✅ Tasks router loaded", file=sys.stderr, flush=True)
+    log.info("router loaded", router="tasks")
 except Exception as e:
-    print(f"❌ Error loading tasks router: {e}", file=sys.stderr, flush=True)
-    import traceback
-    traceback.print_exc(file=sys.stderr)
+    log.error("error loading router", router="tasks", exc_info=e)
 
-print("✅ App initialization complete", file=sys.stderr, flush=True)
+log.info("app initialization complete")
@@ -0,0 +1,213 @@
+# In-process metrics: counters, gauges and histograms keyed by label values
+import bisect
+import threading
+from abc import ABC, abstractmethod
+
+# Latency buckets in seconds, from sub-millisecond up to multi-second stalls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Sharded(ABC):
+    """Per-thread storage so updates never take a lock.
+
+    Each thread writes only to its own dict of series, so an update is a
+    plain dict operation under the GIL. The lock is taken once per thread to
+    register its shard, and by readers, which merge all shards. Shards of
+    threads that have exited (idle threadpool workers) are folded into
+    `_retired` on read so their counts are kept without keeping the shard.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: list[tuple[threading.Thread, dict]] = []
+        self._retired: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _key(self, labels: dict) -> tuple:
+        if not self.labelnames:
+            return ()
+        return tuple([str(labels.get(name, "")) for name in self.labelnames])
+
+    @abstractmethod
+    def _merge(self, into: dict, values: dict) -> None:
+        """Add the series in `values` into `into`"""
+
+    def _collect(self) -> dict:
+        """Merged copy of every shard; a series may be read mid-update by its owner"""
+        merged = {}
+        with self._lock:
+            live = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    self._merge(self._retired, values)
+            self._shards = live
+            self._merge(merged, self._retired)
+            for _, values in live:
+                # dict() copies in one step under the GIL, so the owner can keep writing
+                self._merge(merged, dict(values))
+        return merged
+
+class Counter(_Sharded):
+    """Monotonic counter, optionally split by label values"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        values = self._shard()
+        values[key] = values.get(key, 0) + amount
+
+    def _merge(self, into: dict, values: dict) -> None:
+        for key, value in values.items():
+            into[key] = into.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        return self._collect()
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight; each thread keeps a delta"""
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(_Sharded):
+    """Cumulative-bucket histogram, optionally split by label values"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        values = self._shard()
+        # per label key: [bucket counts..., +Inf count, sum]
+        series = values.get(key)
+        if series is None:
+            series = values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def _merge(self, into: dict, values: dict) -> None:
+        for key, series in values.items():
+            total = into.get(key)
+            if total is None:
+                into[key] = list(series)
+            else:
+                for i, n in enumerate(series):
+                    total[i] += n
+
+    def snapshot(self) -> dict:
+        """Return {label key: {"buckets": {le: cumulative count}, "sum": s, "count": n}}"""
+        result = {}
+        for key, series in self._collect().items():
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                buckets[bound] = cumulative
+            result[key] = {"buckets": buckets, "sum": series[-1], "count": cumulative}
+        return result
+
+def route_template(scope: dict) -> str:
+    """Matched route template of an ASGI request, "unmatched" if routing found none.
+
+    Routers included with a prefix leave their own un-prefixed route in
+    scope["route"], so prefer the effective path FastAPI records for them.
+    """
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or "unmatched"
+
+def escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_float(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+def format_labels(pairs) -> str:
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in pairs]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Register a metric, returning the existing one if the name is taken"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def metrics(self) -> list:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self, prefix: str = "") -> dict:
+        """JSON-friendly view of every metric whose name starts with prefix"""
+        result = {}
+        for metric in self.metrics():
+            if not metric.name.startswith(prefix):
+                continue
+            series = []
+            for key, value in metric.snapshot().items():
+                labels = dict(zip(metric.labelnames, key))
+                if isinstance(metric, Histogram):
+                    value = {
+                        "buckets": {("+Inf" if le == float("inf") else str(le)): n for le, n in value["buckets"].items()},
+                        "sum": value["sum"],
+                        "count": value["count"],
+                    }
+                series.append({"labels": labels, "value": value})
+            result[metric.name] = series
+        return result
+
+    def render_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in sorted(self.metrics(), key=lambda m: m.name):
+            kind = "histogram" if isinstance(metric, Histogram) else "gauge" if isinstance(metric, Gauge) else "counter"
+            lines.append(f"# HELP {metric.name} {escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            for key, value in sorted(metric.snapshot().items()):
+                labels = list(zip(metric.labelnames, key))
+                if kind != "histogram":
+                    lines.append(f"{metric.name}{format_labels(labels)} {format_float(value)}")
+                    continue
+                for le, count in value["buckets"].items():
+                    lines.append(f"{metric.name}_bucket{format_labels(labels + [('le', format_float(le))])} {count}")
+                lines.append(f"{metric.name}_sum{format_labels(labels)} {format_float(value['sum'])}")
+                lines.append(f"{metric.name}_count{format_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
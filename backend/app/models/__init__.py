@@ -1,5 +1,6 @@
 from app.models.user import User
 from app.models.task import Task
+from app.models.task_change import TaskChange
+from app.models.idempotency_key import IdempotencyKey
 
-__all__ = ["User", "Task"]
-
+__all__ = ["User", "Task", "TaskChange", "IdempotencyKey"]
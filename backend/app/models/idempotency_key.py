@@ -0,0 +1,23 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Index, Text
+from datetime import datetime
+
+class IdempotencyKey(SQLModel, table=True):
+    """First response to a write sent with an Idempotency-Key, replayed to retries.
+    
+    Rows are written in the same transaction as the write they describe, so a
+    retry either sees the stored response or the write never happened.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Expired rows are purged per user on every new key
+        Index("ix_idempotency_keys_user_id_expires_at", "user_id", "expires_at"),
+    )
+    
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    key: str = Field(max_length=255, primary_key=True)
+    request_hash: str = Field(max_length=64, nullable=False)
+    status_code: int = Field(nullable=False)
+    response_body: str = Field(sa_column=Column(Text, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(nullable=False)
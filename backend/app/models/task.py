@@ -1,15 +1,35 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, Index, String
 from datetime import datetime
 from typing import Optional
 
 class Task(SQLModel, table=True):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination on list_tasks walks (sort column, id) within one user
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Serves list_tasks filtered by completed (e.g. "my open tasks") in created order
+        Index("ix_tasks_user_id_completed_created_at_id", "user_id", "completed", "created_at", "id"),
+        # Serves sort=updated_at and updated_after filters
+        Index("ix_tasks_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        # Serves sort=position (manual order) as an index scan
+        Index("ix_tasks_user_id_position_id", "user_id", "position", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
     title: str = Field(max_length=255, nullable=False)
     description: Optional[str] = Field(default=None)
     completed: bool = Field(default=False)
+    # Fractional order key (app/ordering.py); equal keys fall back to id order.
+    # Keys compare bytewise, so PostgreSQL stores them with the "C" collation
+    position: str = Field(
+        default="a0",
+        sa_column=Column(
+            String(255).with_variant(String(255, collation="C"), "postgresql"),
+            nullable=False,
+            server_default="a0",
+        ),
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
-
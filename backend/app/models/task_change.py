@@ -0,0 +1,26 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from datetime import datetime
+from typing import Optional
+
+class TaskChange(SQLModel, table=True):
+    """Log of task writes used by the delta sync endpoint.
+    
+    The auto-incrementing id doubles as the sync watermark; writers hold a
+    per-user lock while logging so a user's ids are assigned in commit order.
+    Rows older than the retention window are pruned. task_id has no foreign
+    key on purpose: tombstone rows must outlive the task they describe.
+    """
+    __tablename__ = "task_changes"
+    __table_args__ = (
+        # Delta sync reads "changes for this user after watermark X" in id order
+        Index("ix_task_changes_user_id_id", "user_id", "id"),
+        # Retention pruning deletes a user's rows older than a cutoff
+        Index("ix_task_changes_user_id_changed_at", "user_id", "changed_at"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", nullable=False)
+    task_id: int = Field(nullable=False)
+    deleted: bool = Field(default=False)
+    changed_at: datetime = Field(default_factory=datetime.utcnow)
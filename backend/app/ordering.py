@@ -0,0 +1,132 @@
+# Fractional order keys for manual task ordering.
+#
+# A key is an order-preserving integer part (head letter giving its length,
+# then base-62 digits) followed by an optional base-62 fraction. Any two keys
+# have room between them, so moving a task only rewrites that task's key.
+# Keys compare bytewise: the column uses the "C" collation on PostgreSQL.
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+FIRST_KEY = "a" + DIGITS[0]
+SMALLEST_INTEGER = "A" + DIGITS[0] * 26
+
+def integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"invalid order key head: {head!r}")
+
+def integer_part(key: str) -> str:
+    length = integer_length(key[0])
+    if length > len(key):
+        raise ValueError(f"invalid order key: {key!r}")
+    return key[:length]
+
+def validate_key(key: str) -> None:
+    if not key or key == SMALLEST_INTEGER:
+        raise ValueError(f"invalid order key: {key!r}")
+    integer = integer_part(key)
+    if key[len(integer):].endswith(DIGITS[0]):
+        raise ValueError(f"invalid order key: {key!r}")
+
+def midpoint(a: str, b: str | None) -> str:
+    """Fraction strictly between fractions a and b (b=None means 1)"""
+    if b is not None:
+        # Copy the shared prefix, treating a missing digit in a as 0
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n:
+            return b[:n] + midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[round((digit_a + digit_b) / 2)]
+    # Consecutive digits: keep a's digit and recurse into the next position
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + midpoint(a[1:], None)
+
+def increment_integer(integer: str) -> str | None:
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        d = DIGITS.index(digits[i]) + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+    if head == "Z":
+        return "a" + DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def decrement_integer(integer: str) -> str | None:
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        d = DIGITS.index(digits[i]) - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+def key_between(a: str | None, b: str | None) -> str:
+    """Return a key sorting strictly between a and b (None is an open end).
+
+    Appending or prepending steps the integer part, so keys stay short for
+    the common case; inserting between neighbours bisects the fraction.
+    """
+    if a is not None:
+        validate_key(a)
+    if b is not None:
+        validate_key(b)
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f"{a!r} is not before {b!r}")
+
+    if a is None:
+        if b is None:
+            return FIRST_KEY
+        int_b = integer_part(b)
+        if int_b == SMALLEST_INTEGER:
+            return int_b + midpoint("", b[len(int_b):])
+        if int_b < b:
+            return int_b
+        key = decrement_integer(int_b)
+        if key is None:
+            raise ValueError("cannot order before the smallest key")
+        return key
+
+    int_a = integer_part(a)
+    if b is None:
+        key = increment_integer(int_a)
+        return key if key is not None else int_a + midpoint(a[len(int_a):], None)
+
+    int_b = integer_part(b)
+    if int_a == int_b:
+        return int_a + midpoint(a[len(int_a):], b[len(int_b):])
+    key = increment_integer(int_a)
+    if key is None:
+        raise ValueError("cannot order after the largest key")
+    return key if key < b else int_a + midpoint(a[len(int_a):], None)
+
+def keys_after(a: str | None, count: int) -> list[str]:
+    """`count` consecutive keys after a, e.g. for a batch append or a rebalance"""
+    keys = []
+    for _ in range(count):
+        a = key_between(a, None)
+        keys.append(a)
+    return keys
@@ -0,0 +1,68 @@
+# Request counts, status codes, latency and in-flight requests by route template
+import time
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from app.dependencies.admin import require_admin
+from app.metrics import REGISTRY, route_template
+
+# Finer steps between 25 ms and 1 s, where API latencies sit, so
+# histogram_quantile gives a usable p99 per route
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0)
+
+REQUESTS = REGISTRY.counter(
+    "http_requests_total",
+    "Requests by method, route template and status code",
+    ("method", "route", "status"),
+)
+REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the end of its response",
+    ("method", "route"),
+    buckets=REQUEST_BUCKETS,
+)
+IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests currently being handled")
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware recording every HTTP request in the registry.
+    
+    Requests are labeled with the matched route template rather than the raw
+    path, so /api/7/tasks and /api/8/tasks are one series and cardinality
+    stays bounded; requests no route matched share the "unmatched" label.
+    A handler that raises before responding is counted as a 500.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=route)
+            REQUESTS.inc(method=method, route=route, status=status)
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Every registered metric in the Prometheus text format"""
+    return Response(
+        content=REGISTRY.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
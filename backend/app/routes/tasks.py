@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from pydantic import BaseModel
-from datetime import datetime
-from app.models import Task
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlmodel import select
+from sqlalchemy import bindparam, delete, func, insert, literal, or_, tuple_, update
+from sqlalchemy import select as sa_select
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Literal
+import base64
+import hashlib
+import json
+import time
+from app.cache import cache
+from app.config import settings
+from app.ordering import key_between, keys_after
+from app.models import Task, TaskChange
 from app.dependencies.auth import get_current_user_id
-from app.dependencies.database import get_db_session
+from app.dependencies.database import DbSession, background_session, get_db_session, get_read_db_session, pin_to_primary
+from app.dependencies.idempotency import Idempotency, get_idempotency
+from app.tracing import span
 
 router = APIRouter()
 
@@ -18,53 +32,645 @@ class TaskUpdate(BaseModel):
     description: str | None = None
     completed: bool = False
 
+class TaskPatch(BaseModel):
+    """JSON merge patch: fields left out of the body are not touched"""
+    title: str | None = Field(default=None, max_length=255)
+    description: str | None = None
+    completed: bool | None = None
+
 class TaskComplete(BaseModel):
     completed: bool
 
+class TaskMove(BaseModel):
+    after_id: int | None  # the task to place this one after; null moves it to the top
+
+class TaskBulkAction(BaseModel):
+    action: Literal["complete", "uncomplete", "delete"]
+    ids: list[int] | None = None
+    completed: bool | None = None  # filter: act on every task with this status
+
+# Response models: FastAPI serializes these through pydantic's compiled schema
+# instead of walking every Task with jsonable_encoder
+class TaskPage(BaseModel):
+    tasks: list[Task]
+    next_cursor: str | None = None
+
+class TaskBatchError(BaseModel):
+    index: int
+    detail: str
+
+class TaskBatchResult(BaseModel):
+    tasks: list[Task]
+    errors: list[TaskBatchError]
+
+class TaskBulkResult(BaseModel):
+    action: Literal["complete", "uncomplete", "delete"]
+    affected: list[int]
+    has_more: bool
+
+class TaskChanges(BaseModel):
+    tasks: list[Task]
+    deleted: list[int]
+    since: str
+    has_more: bool
+
+# list_tasks caches finished bytes, so it dumps pages itself with a prebuilt adapter
+TASK_PAGE_ADAPTER = TypeAdapter(TaskPage)
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Task timestamps are stored as naive UTC; normalize aware query values to match"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+async def tasks_written(user_id: int) -> None:
+    """After a committed write: keep the user's reads on the primary and retire their cached pages"""
+    # Pin first: a read between the two steps would otherwise reach the lagging
+    # replica and cache its stale page under the new version for the whole TTL
+    await pin_to_primary(user_id)
+    await cache.invalidate("tasks", user_id)
+
+# Advisory lock namespace for change logging; the second key is the user id
+CHANGE_LOG_LOCK = 4004
+# Rows are kept this long past the retention window, covering writes that were
+# stamped with changed_at a little before they committed
+CHANGE_LOG_GRACE = timedelta(hours=1)
+
+def change_retention() -> timedelta:
+    return timedelta(days=settings.task_change_retention_days)
+
+async def lock_change_log(session: DbSession, user_id: int) -> None:
+    """Serialize the user's change logging until commit and prune their expired rows.
+    
+    Serial ids are assigned at INSERT time, so without the lock a transaction
+    holding a lower id could commit after a client synced past a higher one.
+    Call before anything in the transaction is logged; PostgreSQL's
+    transaction-level advisory lock is released by the commit or rollback.
+    """
+    cutoff = datetime.utcnow() - change_retention() - CHANGE_LOG_GRACE
+    pruned = delete(TaskChange).where(TaskChange.user_id == user_id, TaskChange.changed_at < cutoff)
+    if session.get_bind().dialect.name == "postgresql":
+        # One round trip: a data-modifying CTE always runs, whether or not it is referenced
+        cte = pruned.cte("pruned")
+        await session.exec(sa_select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK, user_id)).add_cte(cte))
+    else:
+        # SQLite serializes writers itself
+        await session.exec(pruned)
+
+def record_change(session: DbSession, task: Task, deleted: bool = False) -> None:
+    """Append a row to the delta sync log in the caller's transaction; see lock_change_log"""
+    session.add(TaskChange(user_id=task.user_id, task_id=task.id, deleted=deleted))
+
+async def execute_logged_write(session: DbSession, user_id: int, statement, deleted: bool = False) -> list:
+    """Run a user-scoped UPDATE/DELETE ... RETURNING and log every affected row.
+    
+    On PostgreSQL the change-log INSERT rides along as a data-modifying CTE,
+    so the write, the log and the returned rows cost one round trip. Other
+    dialects (the SQLite test database) fall back to a second INSERT.
+    Returns the affected rows with every Task column.
+    """
+    await lock_change_log(session, user_id)
+    now = datetime.utcnow()
+    statement = statement.returning(*Task.__table__.c)
+    if session.get_bind().dialect.name == "postgresql":
+        modified = statement.cte("modified")
+        logged = insert(TaskChange).from_select(
+            ["user_id", "task_id", "deleted", "changed_at"],
+            select(modified.c.user_id, modified.c.id, literal(deleted), literal(now)),
+        ).cte("logged")
+        # Plain SQLAlchemy select: SQLModel's would collapse the rows to scalars
+        return (await session.exec(sa_select(modified).add_cte(logged))).all()
+    
+    rows = (await session.exec(statement.execution_options(synchronize_session=False))).all()
+    if rows:
+        await session.exec(
+            insert(TaskChange),
+            params=[{"user_id": row.user_id, "task_id": row.id, "deleted": deleted, "changed_at": now} for row in rows]
+        )
+    return rows
+
+# Conditional GET support: clients may keep a copy but must revalidate it every time
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that identify a representation"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def not_modified_since(if_modified_since: str | None, last_modified: datetime) -> bool:
+    """HTTP dates have one-second resolution, so compare at that granularity"""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+def not_modified(etag: str, last_modified: datetime | None = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return Response(status_code=304, headers=headers)
+
+# Page size limits for list_tasks - the server never returns more than MAX_PAGE_SIZE rows
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Sortable columns for list_tasks; id is always appended as the keyset tie-breaker
+SORT_COLUMNS = {
+    "created_at": Task.created_at,
+    "updated_at": Task.updated_at,
+    "title": Task.title,
+    "position": Task.position,
+}
+
+def encode_cursor(task: Task, sort: str = "created_at", order: str = "asc") -> str:
+    """Encode the (sort value, id) position of a task as an opaque cursor"""
+    value = getattr(task, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, order, value, task.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str = "created_at", order: str = "asc") -> tuple:
+    """Decode a cursor produced by encode_cursor, raising 400 if it is malformed
+    or was issued for a different sort order than the current request"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, value, task_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii"))
+        )
+        if cursor_sort != sort or cursor_order != order:
+            raise ValueError("cursor sort mismatch")
+        if sort in ("title", "position"):
+            if not isinstance(value, str):
+                raise ValueError(f"invalid {sort} cursor")
+        else:
+            value = datetime.fromisoformat(value)
+        return value, int(task_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Manual ordering: keys longer than this get the user's list renumbered in the background
+POSITION_REBALANCE_LENGTH = 32
+
+async def last_position(session: DbSession, user_id: int) -> str | None:
+    """Highest order key of the user's tasks; new tasks are appended after it"""
+    statement = select(func.max(Task.position)).where(Task.user_id == user_id)
+    return (await session.exec(statement)).one()
+
+async def rebalance_positions(session: DbSession, user_id: int) -> int:
+    """Renumber the user's tasks with short evenly spaced keys, keeping their order.
+    
+    Rows are locked for the duration so a concurrent move waits instead of
+    being overwritten. Only rows whose key changes are written and logged.
+    Returns the number of rewritten rows; the caller commits.
+    """
+    statement = (
+        select(Task.id, Task.position)
+        .where(Task.user_id == user_id)
+        .order_by(Task.position, Task.id)
+        .with_for_update()
+    )
+    await lock_change_log(session, user_id)
+    rows = (await session.exec(statement)).all()
+    now = datetime.utcnow()
+    changed = [
+        {"task_id": row.id, "new_position": position}
+        for row, position in zip(rows, keys_after(None, len(rows)))
+        if row.position != position
+    ]
+    if changed:
+        # Core executemany with user_id in the WHERE, so a partitioned tasks table prunes
+        tasks = Task.__table__
+        statement = (
+            update(tasks)
+            .where(tasks.c.user_id == user_id, tasks.c.id == bindparam("task_id"))
+            .values(position=bindparam("new_position"), updated_at=now)
+        )
+        await session.exec(statement, params=changed)
+        await session.exec(
+            insert(TaskChange),
+            params=[{"user_id": user_id, "task_id": row["task_id"], "deleted": False, "changed_at": now} for row in changed]
+        )
+    return len(changed)
+
+async def rebalance_in_background(app, user_id: int) -> None:
+    async with background_session(app) as session:
+        if await rebalance_positions(session, user_id):
+            await session.commit()
+            await tasks_written(user_id)
+
 # TASK-007: List Tasks Endpoint
-@router.get("/api/{user_id}/tasks")
+@router.get("/api/{user_id}/tasks", response_model=TaskPage)
 async def list_tasks(
     user_id: int,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    cursor: str | None = None,
+    completed: bool | None = None,
+    created_after: datetime | None = None,
+    updated_after: datetime | None = None,
+    sort: Literal["created_at", "updated_at", "title", "position"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
     authenticated_user_id: int = Depends(get_current_user_id),
-    session: Session = Depends(get_db_session)
+    session: DbSession = Depends(get_read_db_session)
 ):
     if user_id != authenticated_user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    # User-scoped query (Skills: user-scoped-query.md)
-    statement = select(Task).where(Task.user_id == authenticated_user_id)
-    tasks = session.exec(statement).all()
-    return tasks
+    limit = min(limit, MAX_PAGE_SIZE)
+    
+    async def load_etag() -> bytes:
+        # Collection version: row count plus newest updated_at changes on every create,
+        # update and delete. This aggregate is answered from ix_tasks_user_id_updated_at_id
+        version = await session.exec(
+            select(func.count(Task.id), func.max(Task.updated_at)).where(
+                Task.user_id == authenticated_user_id
+            )
+        )
+        count, last_updated = version.one()
+        return make_etag(authenticated_user_id, count, last_updated, request.url.query).encode()
+    
+    async def load_page() -> bytes:
+        # User-scoped query (Skills: user-scoped-query.md)
+        # Filters are pushed into SQL so "my open tasks" is a range scan on
+        # ix_tasks_user_id_completed_created_at_id rather than a full per-user fetch
+        statement = select(Task).where(Task.user_id == authenticated_user_id)
+        if completed is not None:
+            statement = statement.where(Task.completed == completed)
+        if created_after is not None:
+            statement = statement.where(Task.created_at > to_naive_utc(created_after))
+        if updated_after is not None:
+            statement = statement.where(Task.updated_at > to_naive_utc(updated_after))
+        
+        # Keyset pagination: seek past the last (sort value, id) seen instead of using OFFSET,
+        # so every page costs the same no matter how deep the client pages
+        sort_column = SORT_COLUMNS[sort]
+        if cursor:
+            after_value, after_id = decode_cursor(cursor, sort, order)
+            position = tuple_(sort_column, Task.id)
+            after = tuple_(after_value, after_id)
+            statement = statement.where(position < after if order == "desc" else position > after)
+        if order == "desc":
+            statement = statement.order_by(sort_column.desc(), Task.id.desc())
+        else:
+            statement = statement.order_by(sort_column, Task.id)
+        statement = statement.limit(limit + 1)
+        tasks = (await session.exec(statement)).all()
+        
+        # One extra row tells us whether another page exists without a COUNT query
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(tasks[-1], sort, order)
+        
+        with span("render.task_page", tasks=len(tasks)):
+            return TASK_PAGE_ADAPTER.dump_json(TaskPage(tasks=tasks, next_cursor=next_cursor))
+    
+    # Read-through cache shared by every worker when CACHE_URL is set; task writes
+    # retire the user's entries by bumping its version. The ETag is cached apart
+    # from the page so a conditional GET is answered without loading the page,
+    # whether or not the page itself is cached
+    etag = (await cache.get_or_load("tasks", authenticated_user_id, f"etag:{request.url.query}", load_etag)).decode()
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    # Keyed by the ETag too, so a body is never served under another version's tag
+    body = await cache.get_or_load("tasks", authenticated_user_id, f"page:{etag}:{request.url.query}", load_page)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
 
 # TASK-008: Create Task Endpoint
-@router.post("/api/{user_id}/tasks", status_code=201)
+@router.post("/api/{user_id}/tasks", status_code=201, response_model=Task)
 async def create_task(
     user_id: int,
     task_data: TaskCreate,
     authenticated_user_id: int = Depends(get_current_user_id),
-    session: Session = Depends(get_db_session)
+    session: DbSession = Depends(get_db_session),
+    idempotency: Idempotency = Depends(get_idempotency)
 ):
     if user_id != authenticated_user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
+    if idempotency.replay is not None:
+        return idempotency.replay
+    
+    await lock_change_log(session, authenticated_user_id)
     task = Task(
         user_id=authenticated_user_id,
         title=task_data.title,
-        description=task_data.description
+        description=task_data.description,
+        position=key_between(await last_position(session, authenticated_user_id), None)
     )
     
     session.add(task)
-    session.commit()
-    session.refresh(task)
-    return task
+    await session.flush()  # assigns task.id for the change log
+    record_change(session, task)
+    # Snapshot before commit expires the instance: reloading it would be a SELECT
+    # by id alone, which cannot be pruned to one partition of a partitioned tasks
+    created = task.model_dump()
+    await idempotency.record(session, 201, task.model_dump_json())
+    replay = await idempotency.commit(session)
+    if replay is not None:
+        return replay
+    await tasks_written(authenticated_user_id)
+    return created
+
+# Bulk create: items per request, and the tasks.title column width
+MAX_BATCH_SIZE = 500
+TITLE_MAX_LENGTH = 255
+
+def validate_batch_item(item: Any) -> tuple[TaskCreate | None, str | None]:
+    """Validate one bulk create item, returning (task_data, None) or (None, error)"""
+    try:
+        task_data = TaskCreate.model_validate(item)
+    except ValidationError as e:
+        return None, "; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc']) or 'item'}: {err['msg']}" for err in e.errors()
+        )
+    if len(task_data.title) > TITLE_MAX_LENGTH:
+        return None, f"title: must be at most {TITLE_MAX_LENGTH} characters"
+    return task_data, None
+
+# Bulk Create Endpoint
+@router.post("/api/{user_id}/tasks:batch", status_code=201, response_model=TaskBatchResult)
+async def create_tasks_batch(
+    user_id: int,
+    items: list[Any] = Body(...),
+    partial: bool = False,
+    authenticated_user_id: int = Depends(get_current_user_id),
+    session: DbSession = Depends(get_db_session),
+    idempotency: Idempotency = Depends(get_idempotency)
+):
+    """Create many tasks with one multi-row INSERT ... RETURNING in one transaction.
+    
+    Every item is validated before anything is written. By default one invalid
+    item rejects the whole batch with 422; with ?partial=true the valid items
+    are created and the invalid ones are reported by index in "errors".
+    """
+    if user_id != authenticated_user_id:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    if idempotency.replay is not None:
+        return idempotency.replay
+    
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {MAX_BATCH_SIZE} tasks per request"
+        )
+    
+    valid: list[TaskCreate] = []
+    errors = []
+    for index, item in enumerate(items):
+        task_data, error = validate_batch_item(item)
+        if error:
+            errors.append({"index": index, "detail": error})
+        else:
+            valid.append(task_data)
+    
+    if errors and not partial:
+        return JSONResponse(status_code=422, content={"detail": errors})
+    
+    tasks = []
+    if valid:
+        await lock_change_log(session, authenticated_user_id)
+        # default_factory does not run for Core inserts, so stamp timestamps here
+        now = datetime.utcnow()
+        positions = keys_after(await last_position(session, authenticated_user_id), len(valid))
+        rows = [
+            {
+                "user_id": authenticated_user_id,
+                "title": task_data.title,
+                "description": task_data.description,
+                "completed": False,
+                "position": position,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for task_data, position in zip(valid, positions)
+        ]
+        # sort_by_parameter_order keeps RETURNING rows aligned with the input order
+        result = await session.exec(
+            insert(Task).returning(Task, sort_by_parameter_order=True),
+            params=rows
+        )
+        tasks = result.scalars().all()
+        await session.exec(
+            insert(TaskChange),
+            params=[{"user_id": authenticated_user_id, "task_id": task.id, "deleted": False, "changed_at": now} for task in tasks]
+        )
+        # Snapshot before commit expires the instances, which would cost a SELECT per row
+        tasks = [task.model_dump() for task in tasks]
+        await idempotency.record(
+            session, 201, TaskBatchResult(tasks=tasks, errors=errors).model_dump_json()
+        )
+        replay = await idempotency.commit(session)
+        if replay is not None:
+            return replay
+        await tasks_written(authenticated_user_id)
+    
+    return {"tasks": tasks, "errors": errors}
+
+# Bulk mutate: ids per request, and ids per statement/transaction so no single
+# call holds row locks on a large set for long
+MAX_BULK_IDS = 1000
+BULK_CHUNK_SIZE = 200
+
+async def apply_bulk_chunk(session: DbSession, user_id: int, action: str, ids: list[int]) -> list[int]:
+    """Run one user-scoped UPDATE/DELETE ... RETURNING for a chunk and commit it"""
+    if action == "delete":
+        statement = delete(Task).where(Task.user_id == user_id, Task.id.in_(ids))
+    else:
+        target = action == "complete"
+        # Rows already in the target state are skipped rather than rewritten
+        statement = (
+            update(Task)
+            .where(Task.user_id == user_id, Task.id.in_(ids), Task.completed != target)
+            .values(completed=target, updated_at=datetime.utcnow())
+        )
+    rows = await execute_logged_write(session, user_id, statement, deleted=action == "delete")
+    await session.commit()
+    if rows:
+        await tasks_written(user_id)
+    return [row.id for row in rows]
+
+# Bulk Mutate Endpoint
+@router.post("/api/{user_id}/tasks:bulk", response_model=TaskBulkResult)
+async def bulk_update_tasks(
+    user_id: int,
+    data: TaskBulkAction,
+    authenticated_user_id: int = Depends(get_current_user_id),
+    session: DbSession = Depends(get_db_session),
+    idempotency: Idempotency = Depends(get_idempotency)
+):
+    """Complete, uncomplete or delete many tasks selected by `ids` or by the
+    `completed` filter. Returns the ids that actually changed; with a filter,
+    `has_more` is true when more than MAX_BULK_IDS tasks matched."""
+    if user_id != authenticated_user_id:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    if idempotency.replay is not None:
+        return idempotency.replay
+    
+    if (data.ids is None) == (data.completed is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of ids or completed")
+    
+    has_more = False
+    if data.ids is not None:
+        ids = list(dict.fromkeys(data.ids))
+        if len(ids) > MAX_BULK_IDS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Too many ids: at most {MAX_BULK_IDS} per request"
+            )
+    else:
+        result = await session.exec(
+            select(Task.id)
+            .where(Task.user_id == authenticated_user_id, Task.completed == data.completed)
+            .order_by(Task.id)
+            .limit(MAX_BULK_IDS + 1)
+        )
+        ids = result.all()
+        has_more = len(ids) > MAX_BULK_IDS
+        ids = ids[:MAX_BULK_IDS]
+    
+    affected = []
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        affected.extend(
+            await apply_bulk_chunk(session, authenticated_user_id, data.action, ids[start:start + BULK_CHUNK_SIZE])
+        )
+    
+    result = TaskBulkResult(action=data.action, affected=affected, has_more=has_more)
+    # Chunks commit as they go, so the stored response gets its own small transaction
+    await idempotency.record(session, 200, result.model_dump_json())
+    replay = await idempotency.commit(session)
+    return replay if replay is not None else result
+
+# Delta sync: at most this many change-log rows are consumed per call
+MAX_CHANGES = 1000
+
+def encode_watermark(change_id: int, valid_from: float) -> str:
+    """Sync token for "changes after change_id"; every change after it was logged
+    no earlier than valid_from (a Unix timestamp), so the token stays usable
+    until rows from that time may have been pruned"""
+    raw = f"{change_id}.{int(valid_from)}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+def decode_watermark(token: str) -> tuple[int, float]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        change_id, _, valid_from = raw.partition(".")
+        change_id = int(change_id)
+        if change_id < 0:
+            raise ValueError("negative watermark")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    # Tokens from before retention existed carry no timestamp and count as expired
+    return change_id, float(valid_from) if valid_from.isdigit() else 0.0
+
+def resync_required() -> JSONResponse:
+    """410 for a watermark older than the change log keeps: the client must
+    refetch the full list and sync from the watermark returned here"""
+    return JSONResponse(
+        status_code=410,
+        content={"detail": "Sync token expired: full resync required", "resync": True},
+    )
+
+# Delta Sync Endpoint - declared before /tasks/{task_id} so "changes" is not parsed as an id
+@router.get("/api/{user_id}/tasks/changes", response_model=TaskChanges)
+async def list_task_changes(
+    user_id: int,
+    since: str | None = None,
+    authenticated_user_id: int = Depends(get_current_user_id),
+    session: DbSession = Depends(get_db_session)
+):
+    """Return tasks created/updated and ids deleted after the `since` watermark.
+    
+    Without `since`, only the current watermark is returned; clients take it
+    before a full list_tasks fetch and sync from it afterwards. A watermark
+    older than TASK_CHANGE_RETENTION_DAYS gets 410 with "resync": true, as
+    the changes after it may have been pruned.
+    """
+    if user_id != authenticated_user_id:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    if since is None:
+        result = await session.exec(
+            select(func.max(TaskChange.id)).where(TaskChange.user_id == authenticated_user_id)
+        )
+        latest = result.one()
+        return {"tasks": [], "deleted": [], "since": encode_watermark(latest or 0, time.time()), "has_more": False}
+    
+    after_id, valid_from = decode_watermark(since)
+    if valid_from < time.time() - change_retention().total_seconds():
+        return resync_required()
+    result = await session.exec(
+        select(TaskChange)
+        .where(TaskChange.user_id == authenticated_user_id, TaskChange.id > after_id)
+        .order_by(TaskChange.id)
+        .limit(MAX_CHANGES + 1)
+    )
+    changes = result.all()
+    has_more = len(changes) > MAX_CHANGES
+    # Ids follow commit order per user, so the first change left for the next
+    # call is the oldest one after the new watermark
+    if has_more:
+        valid_from = changes[MAX_CHANGES].changed_at.replace(tzinfo=timezone.utc).timestamp()
+    else:
+        valid_from = time.time()
+    changes = changes[:MAX_CHANGES]
+    
+    # Collapse the log to the latest operation per task
+    latest_deleted: dict[int, bool] = {}
+    for change in changes:
+        latest_deleted[change.task_id] = change.deleted
+    
+    live_ids = [task_id for task_id, deleted in latest_deleted.items() if not deleted]
+    tasks = []
+    if live_ids:
+        result = await session.exec(
+            select(Task)
+            .where(Task.user_id == authenticated_user_id, Task.id.in_(live_ids))
+            .order_by(Task.id)
+        )
+        tasks = result.all()
+    # A task missing here was deleted by a change past this batch; report it now
+    found_ids = {task.id for task in tasks}
+    deleted = sorted(task_id for task_id in latest_deleted if task_id not in found_ids)
+    
+    return {
+        "tasks": tasks,
+        "deleted": deleted,
+        "since": encode_watermark(changes[-1].id if changes else after_id, valid_from),
+        "has_more": has_more,
+    }
 
 # TASK-009: Get Single Task Endpoint
-@router.get("/api/{user_id}/tasks/{task_id}")
+@router.get("/api/{user_id}/tasks/{task_id}", response_model=Task)
 async def get_task(
     user_id: int,
     task_id: int,
+    request: Request,
+    response: Response,
     authenticated_user_id: int = Depends(get_current_user_id),
-    session: Session = Depends(get_db_session)
+    session: DbSession = Depends(get_read_db_session)
 ):
     if user_id != authenticated_user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
@@ -73,43 +679,170 @@ async def get_task(
         Task.id == task_id,
         Task.user_id == authenticated_user_id
     )
-    task = session.exec(statement).first()
+    task = (await session.exec(statement)).first()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
+    etag = make_etag(task.id, task.updated_at.isoformat())
+    if_none_match = request.headers.get("if-none-match")
+    # If-None-Match takes precedence over If-Modified-Since when both are sent
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, task.updated_at)
+    elif not_modified_since(request.headers.get("if-modified-since"), task.updated_at):
+        return not_modified(etag, task.updated_at)
+    
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = format_datetime(task.updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return task
 
 # TASK-010: Update Task Endpoint
-@router.put("/api/{user_id}/tasks/{task_id}")
+@router.put("/api/{user_id}/tasks/{task_id}", response_model=Task)
 async def update_task(
     user_id: int,
     task_id: int,
     task_data: TaskUpdate,
     authenticated_user_id: int = Depends(get_current_user_id),
-    session: Session = Depends(get_db_session)
+    session: DbSession = Depends(get_db_session)
 ):
     if user_id != authenticated_user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    statement = select(Task).where(
+    # Single user-scoped UPDATE ... RETURNING; zero rows means missing or not owned
+    statement = (
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == authenticated_user_id)
+        .values(
+            title=task_data.title,
+            description=task_data.description,
+            completed=task_data.completed,
+            updated_at=datetime.utcnow(),
+        )
+    )
+    rows = await execute_logged_write(session, authenticated_user_id, statement)
+    
+    if not rows:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    await session.commit()
+    await tasks_written(authenticated_user_id)
+    return Task(**rows[0]._mapping)
+
+# Partial Update Endpoint (JSON merge patch)
+@router.patch("/api/{user_id}/tasks/{task_id}", response_model=Task)
+async def patch_task(
+    user_id: int,
+    task_id: int,
+    task_data: TaskPatch,
+    authenticated_user_id: int = Depends(get_current_user_id),
+    session: DbSession = Depends(get_db_session)
+):
+    if user_id != authenticated_user_id:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    changes = task_data.model_dump(exclude_unset=True)
+    # Merge patch null means "remove", which only description allows
+    for field in ("title", "completed"):
+        if field in changes and changes[field] is None:
+            raise HTTPException(status_code=422, detail=f"{field} cannot be null")
+    
+    lookup = select(Task).where(
         Task.id == task_id,
         Task.user_id == authenticated_user_id
     )
-    task = session.exec(statement).first()
+    task = (await session.exec(lookup)).first()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task.title = task_data.title
-    task.description = task_data.description
-    task.completed = task_data.completed
-    task.updated_at = datetime.utcnow()
+    # A patch that matches the stored row writes nothing: no lock, row version,
+    # WAL record or change-log entry
+    changes = {field: value for field, value in changes.items() if getattr(task, field) != value}
+    if not changes:
+        return task
     
-    session.add(task)
-    session.commit()
-    session.refresh(task)
-    return task
+    # The UPDATE re-checks the values so a concurrent write that already applied them is not repeated
+    statement = (
+        update(Task)
+        .where(
+            Task.id == task_id,
+            Task.user_id == authenticated_user_id,
+            or_(*(getattr(Task, field).is_distinct_from(value) for field, value in changes.items())),
+        )
+        .values(**changes, updated_at=datetime.utcnow())
+    )
+    rows = await execute_logged_write(session, authenticated_user_id, statement)
+    if not rows:
+        # Deleted or changed to these values since the SELECT above
+        await session.rollback()
+        task = (await session.exec(lookup)).first()
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return task
+    
+    await session.commit()
+    await tasks_written(authenticated_user_id)
+    return Task(**rows[0]._mapping)
+
+# Move Endpoint (manual ordering)
+@router.post("/api/{user_id}/tasks/{task_id}/move", response_model=Task)
+async def move_task(
+    user_id: int,
+    task_id: int,
+    data: TaskMove,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    authenticated_user_id: int = Depends(get_current_user_id),
+    session: DbSession = Depends(get_db_session)
+):
+    """Place a task right after `after_id` (or first) by rewriting only its own key"""
+    if user_id != authenticated_user_id:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    if data.after_id == task_id:
+        raise HTTPException(status_code=400, detail="A task cannot be moved after itself")
+    
+    async def neighbours() -> tuple[str | None, str | None]:
+        # Keys of the tasks the moved one will sit between, skipping the moved task itself
+        others = select(Task.position, Task.id).where(
+            Task.user_id == authenticated_user_id,
+            Task.id != task_id
+        )
+        before = None
+        if data.after_id is not None:
+            after = (await session.exec(others.where(Task.id == data.after_id))).first()
+            if after is None:
+                raise HTTPException(status_code=404, detail="Task not found")
+            before = after.position
+            others = others.where(tuple_(Task.position, Task.id) > tuple_(after.position, after.id))
+        following = (await session.exec(others.order_by(Task.position, Task.id).limit(1))).first()
+        return before, following.position if following else None
+    
+    before, following = await neighbours()
+    if before is not None and following is not None and before >= following:
+        # Neighbours share a key (e.g. rows from before manual ordering existed):
+        # renumber the list once so there is room between them
+        await rebalance_positions(session, authenticated_user_id)
+        before, following = await neighbours()
+    position = key_between(before, following)
+    
+    statement = (
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == authenticated_user_id)
+        .values(position=position, updated_at=datetime.utcnow())
+    )
+    rows = await execute_logged_write(session, authenticated_user_id, statement)
+    
+    if not rows:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    await session.commit()
+    await tasks_written(authenticated_user_id)
+    if len(position) > POSITION_REBALANCE_LENGTH:
+        background_tasks.add_task(rebalance_in_background, request.app, authenticated_user_id)
+    return Task(**rows[0]._mapping)
 
 # TASK-011: Delete Task Endpoint
 @router.delete("/api/{user_id}/tasks/{task_id}", status_code=204)
@@ -117,50 +850,46 @@ async def delete_task(
     user_id: int,
     task_id: int,
     authenticated_user_id: int = Depends(get_current_user_id),
-    session: Session = Depends(get_db_session)
+    session: DbSession = Depends(get_db_session)
 ):
     if user_id != authenticated_user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    statement = select(Task).where(
+    statement = delete(Task).where(
         Task.id == task_id,
         Task.user_id == authenticated_user_id
     )
-    task = session.exec(statement).first()
+    rows = await execute_logged_write(session, authenticated_user_id, statement, deleted=True)
     
-    if not task:
+    if not rows:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    session.delete(task)
-    session.commit()
+    await session.commit()
+    await tasks_written(authenticated_user_id)
     return None
 
 # TASK-012: Toggle Completion Endpoint
-@router.patch("/api/{user_id}/tasks/{task_id}/complete")
+@router.patch("/api/{user_id}/tasks/{task_id}/complete", response_model=Task)
 async def toggle_complete(
     user_id: int,
     task_id: int,
     data: TaskComplete,
     authenticated_user_id: int = Depends(get_current_user_id),
-    session: Session = Depends(get_db_session)
+    session: DbSession = Depends(get_db_session)
 ):
     if user_id != authenticated_user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    statement = select(Task).where(
-        Task.id == task_id,
-        Task.user_id == authenticated_user_id
+    statement = (
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == authenticated_user_id)
+        .values(completed=data.completed, updated_at=datetime.utcnow())
     )
-    task = session.exec(statement).first()
+    rows = await execute_logged_write(session, authenticated_user_id, statement)
     
-    if not task:
+    if not rows:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task.completed = data.completed
-    task.updated_at = datetime.utcnow()
-    
-    session.add(task)
-    session.commit()
-    session.refresh(task)
-    return task
-
+    await session.commit()
+    await tasks_written(authenticated_user_id)
+    return Task(**rows[0]._mapping)
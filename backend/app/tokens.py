@@ -0,0 +1,202 @@
+# HS256 access tokens: signing keys with kid-based rotation and interchangeable codecs
+import base64
+import hashlib
+import hmac
+import time
+from abc import ABC, abstractmethod
+import orjson
+
+try:
+    import jwt as pyjwt
+except ImportError:  # optional: the pyjwt codec is only offered when PyJWT is installed
+    pyjwt = None
+
+from jose import jwt as jose_jwt
+from jose import ExpiredSignatureError, JWTError
+
+ALGORITHM = "HS256"
+
+class TokenError(Exception):
+    """The token is malformed, signed with an unknown key or has a bad signature"""
+
+class TokenExpired(TokenError):
+    """The token verified but its exp is in the past"""
+
+class KeySet:
+    """Secrets that verify tokens, by kid, and the one that signs new tokens.
+    
+    Tokens without a kid header (everything issued before rotation existed)
+    verify against `default`, the BETTER_AUTH_SECRET. To rotate, put a new
+    key first in AUTH_KEYS: new tokens are signed with it while tokens under
+    the older keys keep working until they expire, so nobody has to log in
+    again (and re-run bcrypt) at once. Drop an old key after the token
+    lifetime has passed.
+    """
+    
+    def __init__(self, keys: dict[str, str] | None = None, signing_kid: str | None = None, default: str = ""):
+        self.keys = {kid: secret.encode("utf-8") for kid, secret in (keys or {}).items()}
+        self.default = default.encode("utf-8") if default else None
+        if signing_kid is not None and signing_kid not in self.keys:
+            raise ValueError(f"signing key {signing_kid!r} is not in the key set")
+        self.signing_kid = signing_kid
+        # Identifies this exact set of keys, e.g. for caches of verified tokens
+        material = orjson.dumps(
+            [sorted(self.keys.items()), self.default, signing_kid],
+            default=lambda value: value.decode("latin-1"),
+        )
+        self.fingerprint = hashlib.sha256(material).hexdigest()
+    
+    @classmethod
+    def parse(cls, spec: str, default: str = "") -> "KeySet":
+        """'k2=secret2,k1=secret1' -> keys by kid, the first one signing"""
+        keys = {}
+        for item in spec.split(","):
+            kid, _, secret = item.strip().partition("=")
+            if not kid:
+                continue
+            if not secret:
+                raise ValueError(f"AUTH_KEYS entry {kid!r} has no secret")
+            keys[kid.strip()] = secret.strip()
+        return cls(keys, next(iter(keys), None), default)
+    
+    def __bool__(self) -> bool:
+        return bool(self.keys) or self.default is not None
+    
+    def signing_key(self) -> tuple[str | None, bytes]:
+        if self.signing_kid is not None:
+            return self.signing_kid, self.keys[self.signing_kid]
+        if self.default is None:
+            raise TokenError("no signing key configured")
+        return None, self.default
+    
+    def verification_key(self, kid) -> bytes:
+        if kid is None:
+            if self.default is None:
+                raise TokenError("token has no kid and no default key is configured")
+            return self.default
+        key = self.keys.get(kid) if isinstance(kid, str) else None
+        if key is None:
+            raise TokenError("unknown signing key")
+        return key
+
+class TokenCodec(ABC):
+    """Encodes and verifies HS256 JWTs; subclasses wrap one JWT implementation"""
+    
+    name = ""
+    
+    @abstractmethod
+    def encode(self, claims: dict, keys: KeySet) -> str:
+        """Signed token for claims, with the signing key's kid in the header"""
+    
+    @abstractmethod
+    def decode(self, token: str, keys: KeySet) -> dict:
+        """Verified claims; raises TokenExpired or TokenError"""
+
+def b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def b64url_decode(data: bytes) -> bytes:
+    # validate=True rejects stray characters instead of silently skipping them
+    return base64.b64decode(data + b"=" * (-len(data) % 4), altchars=b"-_", validate=True)
+
+class NativeCodec(TokenCodec):
+    """HS256 on the standard library: hmac runs in OpenSSL and orjson parses the
+    claims, so a verification is two C calls plus the base64 decoding"""
+    
+    name = "native"
+    
+    def encode(self, claims: dict, keys: KeySet) -> str:
+        kid, key = keys.signing_key()
+        header = {"alg": ALGORITHM, "typ": "JWT"}
+        if kid is not None:
+            header["kid"] = kid
+        signing_input = b64url_encode(orjson.dumps(header)) + b"." + b64url_encode(orjson.dumps(claims))
+        signature = hmac.new(key, signing_input, hashlib.sha256).digest()
+        return (signing_input + b"." + b64url_encode(signature)).decode("ascii")
+    
+    def decode(self, token: str, keys: KeySet) -> dict:
+        try:
+            raw = token.encode("ascii")
+            signing_input, _, signature = raw.rpartition(b".")
+            encoded_header, _, encoded_claims = signing_input.partition(b".")
+            header = orjson.loads(b64url_decode(encoded_header))
+            if not isinstance(header, dict) or header.get("alg") != ALGORITHM:
+                raise TokenError("unsupported algorithm")
+            expected = hmac.new(keys.verification_key(header.get("kid")), signing_input, hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, b64url_decode(signature)):
+                raise TokenError("signature verification failed")
+            claims = orjson.loads(b64url_decode(encoded_claims))
+        except TokenError:
+            raise
+        except (ValueError, UnicodeError, orjson.JSONDecodeError) as e:
+            raise TokenError("malformed token") from e
+        if not isinstance(claims, dict):
+            raise TokenError("claims must be a JSON object")
+        check_time_claims(claims)
+        return claims
+
+def check_time_claims(claims: dict) -> None:
+    """exp and nbf as python-jose enforces them (no leeway)"""
+    now = time.time()
+    for name in ("exp", "nbf", "iat"):
+        if name in claims and (isinstance(claims[name], bool) or not isinstance(claims[name], (int, float))):
+            raise TokenError(f"invalid {name} claim")
+    if "nbf" in claims and claims["nbf"] > now:
+        raise TokenError("token is not yet valid")
+    if "exp" in claims and claims["exp"] < now:
+        raise TokenExpired("signature has expired")
+
+class JoseCodec(TokenCodec):
+    """python-jose, the original implementation"""
+    
+    name = "jose"
+    
+    def encode(self, claims: dict, keys: KeySet) -> str:
+        kid, key = keys.signing_key()
+        headers = {"kid": kid} if kid is not None else None
+        return jose_jwt.encode(claims, key, algorithm=ALGORITHM, headers=headers)
+    
+    def decode(self, token: str, keys: KeySet) -> dict:
+        try:
+            kid = jose_jwt.get_unverified_header(token).get("kid")
+            return jose_jwt.decode(token, keys.verification_key(kid), algorithms=[ALGORITHM])
+        except ExpiredSignatureError as e:
+            raise TokenExpired(str(e)) from e
+        except JWTError as e:
+            raise TokenError(str(e)) from e
+
+class PyJWTCodec(TokenCodec):
+    """PyJWT, when installed"""
+    
+    name = "pyjwt"
+    
+    def encode(self, claims: dict, keys: KeySet) -> str:
+        kid, key = keys.signing_key()
+        headers = {"kid": kid} if kid is not None else None
+        return pyjwt.encode(claims, key, algorithm=ALGORITHM, headers=headers)
+    
+    def decode(self, token: str, keys: KeySet) -> dict:
+        try:
+            kid = pyjwt.get_unverified_header(token).get("kid")
+            # Claims such as sub are not required, as with the other codecs
+            return pyjwt.decode(token, keys.verification_key(kid), algorithms=[ALGORITHM],
+                                options={"verify_aud": False})
+        except pyjwt.ExpiredSignatureError as e:
+            raise TokenExpired(str(e)) from e
+        except pyjwt.InvalidTokenError as e:
+            raise TokenError(str(e)) from e
+
+def available_codecs() -> dict[str, TokenCodec]:
+    """Codecs this process can use, by name"""
+    codecs = [NativeCodec(), JoseCodec()]
+    if pyjwt is not None:
+        codecs.append(PyJWTCodec())
+    return {codec.name: codec for codec in codecs}
+
+def get_codec(name: str) -> TokenCodec:
+    codecs = available_codecs()
+    if name == PyJWTCodec.name and pyjwt is None:
+        raise ValueError("token codec 'pyjwt' needs PyJWT, which is not installed")
+    if name not in codecs:
+        raise ValueError(f"unknown token codec {name!r}; available: {', '.join(codecs)}")
+    return codecs[name]
@@ -0,0 +1,233 @@
+# Request tracing: spans per request and around auth, DB and rendering work
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from fastapi import APIRouter, Depends
+from starlette.datastructures import Headers, MutableHeaders
+from app.dependencies.admin import require_admin
+from app.metrics import route_template
+
+class Span:
+    """One timed operation in a trace; children share the root's `trace` list"""
+    
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start_ns", "end_ns", "error", "trace")
+    
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, trace: list, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self.trace = trace
+    
+    def child(self, name: str, **attributes) -> "Span":
+        return Span(name, self.trace_id, self.span_id, self.trace, attributes)
+    
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.trace.append(self)
+    
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+    
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+# The span new child spans attach to; None when the request is not sampled,
+# which makes every span() call a no-op
+current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span; yields None when not tracing"""
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, **attributes)
+    token = current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current_span.reset(token)
+        child.end()
+
+def start_span(name: str, **attributes) -> Span | None:
+    """A child span that is not made current, for hooks whose start and end
+    run in separate callbacks (e.g. SQLAlchemy events); call end() on it"""
+    parent = current_span.get()
+    return parent.child(name, **attributes) if parent is not None else None
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """(trace_id, parent span_id, sampled) from a W3C traceparent header, or None if invalid"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    if version == "00" and len(parts) != 4:
+        return None
+    if len(trace_id) != 32 or len(parent_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        int(trace_id, 16), int(parent_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id.lower(), parent_id.lower(), sampled
+
+def format_traceparent(span: Span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+class InMemoryExporter:
+    """Keeps the most recent finished traces for /api/debug/traces"""
+    
+    def __init__(self, max_traces: int = 200):
+        self.traces = deque(maxlen=max_traces)
+    
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append([s.to_dict() for s in spans])
+    
+    def recent(self, limit: int = 20, min_ms: float = 0) -> list[list[dict]]:
+        traces = [t for t in list(self.traces) if t[-1]["duration_ms"] >= min_ms]
+        return traces[-limit:][::-1]
+
+class FileExporter:
+    """Appends spans as JSON lines from a background thread, so requests never wait on the disk"""
+    
+    def __init__(self, path: str, max_queued: int = 1000):
+        self.path = path
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.thread = threading.Thread(target=self._write, name="trace-file-exporter", daemon=True)
+        self.thread.start()
+    
+    def export(self, spans: list[Span]) -> None:
+        try:
+            self.queue.put_nowait([s.to_dict() for s in spans])
+        except queue.Full:
+            pass  # drop the trace rather than block the request
+    
+    def _write(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            with open(self.path, "a", encoding="utf-8") as f:
+                for trace in batch:
+                    for s in trace:
+                        f.write(json.dumps(s) + "\n")
+            for _ in batch:
+                self.queue.task_done()
+
+class Tracer:
+    """Sampling decision and export for root spans.
+    
+    A request is traced when its traceparent says the caller sampled it, or
+    otherwise with probability `sample_rate`. Unsampled requests create no
+    span objects at all, so at a low rate tracing costs one header lookup
+    and one random() per request.
+    """
+    
+    def __init__(self, sample_rate: float = 0.0, exporters: list | None = None):
+        self.sample_rate = sample_rate
+        self.exporters = exporters or []
+    
+    def start_trace(self, name: str, traceparent: str | None = None, **attributes) -> Span | None:
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = None, None, False
+        if not sampled and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return None
+        return Span(name, trace_id or os.urandom(16).hex(), parent_id, [], attributes)
+    
+    def finish(self, root: Span) -> None:
+        root.end()
+        # Children end before the root, so the root is last in the trace
+        for exporter in self.exporters:
+            exporter.export(root.trace)
+
+memory_exporter = InMemoryExporter()
+tracer = Tracer(exporters=[memory_exporter])
+
+def configure_tracing(sample_rate: float = 0.0, max_traces: int = 200, path: str = "") -> None:
+    """Set the sample rate and exporters of the shared tracer"""
+    memory_exporter.traces = deque(maxlen=max_traces)
+    tracer.sample_rate = sample_rate
+    tracer.exporters = [memory_exporter]
+    if path:
+        tracer.exporters.append(FileExporter(path))
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening the root span of each sampled request.
+    
+    The span is named after the route template once routing has run, and
+    the response carries a `traceresponse` header (W3C Trace Context level
+    2) with the trace id so a slow response can be looked up.
+    """
+    
+    def __init__(self, app, tracer: Tracer = tracer):
+        self.app = app
+        self.tracer = tracer
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        traceparent = Headers(scope=scope).get("traceparent")
+        root = self.tracer.start_trace("request", traceparent, **{"http.method": scope["method"], "http.target": scope["path"]})
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                MutableHeaders(raw=message["headers"]).append("traceresponse", format_traceparent(root))
+            await send(message)
+        
+        token = current_span.set(root)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current_span.reset(token)
+            route = route_template(scope)
+            root.name = f"{scope['method']} {route}"
+            root.attributes["http.route"] = route
+            self.tracer.finish(root)
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/api/debug/traces")
+async def recent_traces(limit: int = 20, min_ms: float = 0):
+    """Most recent sampled traces (newest first), each a list of spans ending with the root"""
+    return {"traces": memory_exporter.recent(limit, min_ms)}
@@ -0,0 +1,77 @@
+"""
+Throughput of the bearer-token dependency at high request rates.
+
+Paths:
+  threadpool_decode  - resolve the secret and jwt.decode every token in the
+                       threadpool (how get_current_user_id ran before)
+  cache_miss         - get_current_user_id with a new token each call
+  cache_hit          - get_current_user_id with the same token repeated, the
+                       common case of one client polling its task list
+
+Usage:
+  cd backend
+  python benchmarks/bench_auth.py --calls 20000 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BETTER_AUTH_SECRET", "benchmark-secret-not-for-production")
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from starlette.concurrency import run_in_threadpool
+
+from app.dependencies.auth import get_current_user_id, resolve_auth_secret, verified_tokens
+from app.routes.auth import create_jwt
+
+def decode_every_time(credentials: HTTPAuthorizationCredentials) -> int:
+    payload = jwt.decode(credentials.credentials, resolve_auth_secret(), algorithms=["HS256"])
+    return payload["user_id"]
+
+async def run(call, tokens: list[str], concurrency: int) -> float:
+    """Calls per second with `concurrency` callers working through `tokens`"""
+    credentials = [HTTPAuthorizationCredentials(scheme="Bearer", credentials=t) for t in tokens]
+    position = 0
+
+    async def caller():
+        nonlocal position
+        while position < len(credentials):
+            item = credentials[position]
+            position += 1
+            await call(item)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return len(credentials) / (time.perf_counter() - started)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    # Distinct tokens: different users, so no two share a signature
+    distinct = [create_jwt(i, f"user{i}@example.com") for i in range(args.calls)]
+    repeated = [distinct[0]] * args.calls
+
+    paths = {
+        "threadpool_decode": (lambda c: run_in_threadpool(decode_every_time, c), distinct),
+        "cache_miss": (get_current_user_id, distinct),
+        "cache_hit": (get_current_user_id, repeated),
+    }
+    print(f"{args.calls} calls, {args.concurrency} concurrent callers")
+    print(f"{'path':<19}{'calls/s':>10}{'us/call':>9}{'speedup':>9}")
+    baseline = None
+    for name, (call, tokens) in paths.items():
+        verified_tokens.clear()
+        rate = await run(call, tokens, args.concurrency)
+        baseline = baseline or rate
+        print(f"{name:<19}{rate:>10.0f}{1e6 / rate:>9.1f}{rate / baseline:>8.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,220 @@
+"""
+Concurrent-request throughput of the task routes on one worker, per session mode.
+
+Modes:
+  blocking    - sync Session called directly inside the async handlers
+                (how the routes behaved before the async port)
+  threadpool  - sync psycopg2 Session behind ThreadedSession (DATABASE_ASYNC unset)
+  async       - asyncpg engine with AsyncSession (DATABASE_ASYNC=true)
+
+Usage:
+  cd backend
+  DATABASE_URL=postgresql://... python benchmarks/bench_db_concurrency.py \\
+      --concurrency 32 --requests 1000 --latency-ms 20
+
+--latency-ms routes the database connections through a local TCP proxy that
+delays every packet, which approximates the round trip to a remote Neon
+database when benchmarking against a local PostgreSQL.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BETTER_AUTH_SECRET", "benchmark-secret-not-for-production")
+
+import httpx
+from sqlalchemy import delete
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.main import app
+from app.models import Task, TaskChange, User
+from app.dependencies.database import ThreadedSession, get_db_session, to_async_url
+from app.routes.auth import create_jwt
+
+class InlineSession(ThreadedSession):
+    """Sync Session calls made directly on the event loop (pre-port behaviour)"""
+
+def _inline(name):
+    async def method(self, *args, **kwargs):
+        return getattr(self.sync_session, name)(*args, **kwargs)
+    return method
+
+for _name in ("exec", "execute", "scalars", "scalar", "get", "delete",
+              "flush", "commit", "rollback", "refresh", "close"):
+    setattr(InlineSession, _name, _inline(_name))
+
+class DelayProxy:
+    """TCP proxy on its own thread that delays each chunk by a one-way latency"""
+
+    def __init__(self, upstream_host: str, upstream_port: int, one_way_delay: float):
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.delay = one_way_delay
+        self.port = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.run(self._serve())
+
+    async def _open_upstream(self):
+        if self.upstream_host.startswith("/"):
+            path = os.path.join(self.upstream_host, f".s.PGSQL.{self.upstream_port}")
+            return await asyncio.open_unix_connection(path)
+        return await asyncio.open_connection(self.upstream_host, self.upstream_port)
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(self.delay)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, client_reader, client_writer):
+        upstream_reader, upstream_writer = await self._open_upstream()
+        await asyncio.gather(
+            self._pipe(client_reader, upstream_writer),
+            self._pipe(upstream_reader, client_writer),
+        )
+
+    async def _serve(self):
+        server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await server.serve_forever()
+
+def seed(engine, tasks: int) -> User:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email=f"bench-{uuid.uuid4().hex[:12]}@example.com", password_hash="x")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        session.add_all(Task(user_id=user.id, title=f"Benchmark task {i}") for i in range(tasks))
+        session.commit()
+        session.refresh(user)
+        session.expunge(user)
+        return user
+
+def cleanup(engine, user_id: int) -> None:
+    with Session(engine) as session:
+        session.exec(delete(TaskChange).where(TaskChange.user_id == user_id))
+        session.exec(delete(Task).where(Task.user_id == user_id))
+        session.exec(delete(User).where(User.id == user_id))
+        session.commit()
+
+async def drive(path: str, token: str, concurrency: int, total: int) -> tuple[float, list[float]]:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: list[float] = []
+    remaining = iter(range(total))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies
+
+def install_mode(mode: str, url, concurrency: int):
+    """Override get_db_session for one mode; returns an async disposer"""
+    pool = {"pool_size": concurrency, "max_overflow": 0, "pool_pre_ping": True}
+    if mode == "async":
+        engine = create_async_engine(to_async_url(url.render_as_string(hide_password=False)), **pool)
+
+        async def override():
+            async with AsyncSession(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_db_session] = override
+        return engine.dispose
+
+    engine = create_engine(url, **pool)
+    wrapper = ThreadedSession if mode == "threadpool" else InlineSession
+
+    async def override():
+        session = wrapper(Session(engine))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    app.dependency_overrides[get_db_session] = override
+
+    async def dispose():
+        engine.dispose()
+    return dispose
+
+async def run_mode(mode: str, url, path: str, token: str, concurrency: int, total: int):
+    """Warm the pool and measure one mode on a single event loop (asyncpg
+    connections cannot move between loops)"""
+    dispose = install_mode(mode, url, concurrency)
+    try:
+        await drive(path, token, concurrency, concurrency)
+        return await drive(path, token, concurrency, total)
+    finally:
+        app.dependency_overrides.clear()
+        await dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", ""))
+    parser.add_argument("--modes", default="blocking,threadpool,async")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=50, help="tasks seeded for the benchmark user")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated database round trip")
+    args = parser.parse_args()
+
+    if not args.database_url.startswith(("postgresql://", "postgres://")):
+        parser.error("a PostgreSQL --database-url (or DATABASE_URL) is required")
+
+    url = make_url(args.database_url).set(drivername="postgresql")
+    user = seed(create_engine(url), args.tasks)
+    token = create_jwt(user.id, user.email)
+
+    if args.latency_ms > 0:
+        host = url.query.get("host") or url.host or "localhost"
+        proxy = DelayProxy(host, url.port or 5432, args.latency_ms / 2000)
+        url = url.set(host="127.0.0.1", port=proxy.port).difference_update_query(["host"])
+
+    path = f"/api/{user.id}/tasks?limit=50"
+    print(f"{args.requests} x GET /api/{{user_id}}/tasks, concurrency {args.concurrency}, "
+          f"simulated RTT {args.latency_ms:g} ms")
+    print(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    try:
+        for mode in args.modes.split(","):
+            elapsed, latencies = asyncio.run(
+                run_mode(mode, url, path, token, args.concurrency, args.requests)
+            )
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{mode:<12}{args.requests / elapsed:>10.1f}"
+                  f"{statistics.median(latencies) * 1000:>10.1f}{p99 * 1000:>10.1f}")
+    finally:
+        cleanup(create_engine(make_url(args.database_url).set(drivername="postgresql")), user.id)
+
+if __name__ == "__main__":
+    main()
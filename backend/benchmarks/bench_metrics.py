@@ -0,0 +1,89 @@
+"""
+Cost of recording a metric on the request hot path.
+
+Compares the sharded registry (app/metrics.py) with a single-lock
+histogram, which is how the registry worked before /metrics, for one
+thread and for several threads updating the same series the way
+threadpool workers and the event loop do.
+
+Usage:
+  cd backend
+  python benchmarks/bench_metrics.py --ops 200000 --threads 1 4 8
+"""
+import argparse
+import bisect
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.metrics import Registry
+from app.request_metrics import REQUEST_BUCKETS
+
+class LockedHistogram:
+    """Baseline: every observation takes one shared lock"""
+
+    def __init__(self, labelnames: tuple, buckets: tuple):
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+def run(histogram, threads: int, ops: int) -> float:
+    """Nanoseconds per observation with `threads` threads sharing `ops` observations"""
+    per_thread = ops // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        observe = histogram.observe
+        barrier.wait()
+        for i in range(per_thread):
+            observe(0.001 * (i % 500), method="GET", route="/api/{user_id}/tasks")
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / (per_thread * threads) * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    print(f"Histogram.observe with route labels, {args.ops} observations per run")
+    print(f"{'threads':<9}{'locked ns':>11}{'sharded ns':>12}{'speedup':>9}")
+    for threads in args.threads:
+        locked = run(LockedHistogram(("method", "route"), REQUEST_BUCKETS), threads, args.ops)
+        sharded_histogram = Registry().histogram("bench_seconds", "", ("method", "route"), REQUEST_BUCKETS)
+        sharded = run(sharded_histogram, threads, args.ops)
+        assert sharded_histogram.snapshot()[("GET", "/api/{user_id}/tasks")]["count"] == args.ops // threads * threads
+        print(f"{threads:<9}{locked:>11.0f}{sharded:>12.0f}{locked / sharded:>8.1f}x")
+
+    registry = Registry()
+    for route in range(40):
+        histogram = registry.histogram(f"bench_{route}_seconds", "", ("method", "route"), REQUEST_BUCKETS)
+        for status in range(5):
+            histogram.observe(0.01, method="GET", route=f"/route/{status}")
+    started = time.perf_counter()
+    body = registry.render_prometheus()
+    print(f"Rendering {body.count(chr(10))} lines for a scrape: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Serialization cost of a large task list response, per rendering path.
+
+Paths:
+  jsonable_encoder  - jsonable_encoder + stdlib json via JSONResponse
+                      (how routes returning Task objects were rendered before)
+  response_model    - pydantic's compiled TaskPage serializer to JSON-compatible
+                      data, then FastJSONResponse (orjson); the path for routes
+                      with a response model under the app default class
+  type_adapter      - TASK_PAGE_ADAPTER.dump_json straight to bytes
+                      (what list_tasks stores in the cache)
+
+Usage:
+  cd backend
+  python benchmarks/bench_serialization.py --tasks 10000 --rounds 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BETTER_AUTH_SECRET", "benchmark-secret-not-for-production")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models import Task
+from app.responses import FastJSONResponse
+from app.routes.tasks import TASK_PAGE_ADAPTER, TaskPage
+
+def make_tasks(count: int) -> list[Task]:
+    now = datetime.utcnow()
+    return [
+        Task(
+            id=i,
+            user_id=1,
+            title=f"Benchmark task {i}",
+            description="Pick up groceries and drop off the dry cleaning" if i % 3 else None,
+            completed=i % 2 == 0,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.tasks)
+    paths = {
+        "jsonable_encoder": lambda: JSONResponse(jsonable_encoder({"tasks": tasks, "next_cursor": None})).body,
+        "response_model": lambda: FastJSONResponse(
+            TASK_PAGE_ADAPTER.dump_python(TaskPage(tasks=tasks, next_cursor=None), mode="json")
+        ).body,
+        "type_adapter": lambda: TASK_PAGE_ADAPTER.dump_json(TaskPage(tasks=tasks, next_cursor=None)),
+    }
+
+    # Every path must produce the same document
+    documents = {name: json.loads(render()) for name, render in paths.items()}
+    reference = documents["jsonable_encoder"]
+    for name, document in documents.items():
+        assert document == reference, f"{name} output differs from jsonable_encoder"
+
+    print(f"Serializing a {args.tasks}-task list, best/median of {args.rounds} rounds")
+    print(f"{'path':<18}{'best ms':>10}{'median ms':>11}{'KB':>9}{'speedup':>9}")
+    baseline = None
+    for name, render in paths.items():
+        timings = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            body = render()
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(f"{name:<18}{min(timings) * 1000:>10.1f}{median * 1000:>11.1f}"
+              f"{len(body) / 1024:>9.0f}{baseline / median:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Encode and decode throughput of each available token codec.
+
+Every codec signs the same claims create_jwt issues, with a kid so the key
+lookup is included, and decodes the tokens it produced. Codecs whose
+library is not installed (PyJWT) are skipped.
+
+Usage:
+  cd backend
+  python benchmarks/bench_tokens.py --tokens 20000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.tokens import KeySet, available_codecs
+
+def claims(i: int) -> dict:
+    now = int(time.time())
+    return {"user_id": i, "email": f"user{i}@example.com", "iat": now, "exp": now + 86400}
+
+def rate(call, items: list) -> float:
+    """Calls per second of `call` over `items`"""
+    started = time.perf_counter()
+    for item in items:
+        call(item)
+    return len(items) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=20000)
+    args = parser.parse_args()
+
+    keys = KeySet.parse("current=benchmark-key-not-for-production,previous=older-key", default="legacy-secret")
+    payloads = [claims(i) for i in range(args.tokens)]
+
+    results = {}
+    for name, codec in available_codecs().items():
+        encode = rate(lambda p: codec.encode(p, keys), payloads)
+        tokens = [codec.encode(p, keys) for p in payloads]
+        decode = rate(lambda t: codec.decode(t, keys), tokens)
+        results[name] = (encode, decode)
+
+    # Speedups are relative to python-jose, which create_jwt and
+    # get_current_user_id used before codecs existed
+    base_encode, base_decode = results["jose"]
+    print(f"{args.tokens} tokens per codec")
+    print(f"{'codec':<8}{'encode/s':>10}{'us':>7}{'speedup':>9}{'decode/s':>10}{'us':>7}{'speedup':>9}")
+    for name, (encode, decode) in results.items():
+        print(f"{name:<8}{encode:>10.0f}{1e6 / encode:>7.1f}{encode / base_encode:>8.1f}x"
+              f"{decode:>10.0f}{1e6 / decode:>7.1f}{decode / base_decode:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlmodel import SQLModel, create_engine
+from sqlalchemy import text
 from app.models import User, Task
+from app.partitioning import create_partitioned_tasks, migrate_to_partitioned, partition_count, tasks_relkind
 import sys
 
 class Settings(BaseSettings):
     database_url: str
+    # Hash partitions for tasks (by user_id); 0 keeps tasks a plain table
+    tasks_partitions: int = 0
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -23,11 +27,60 @@ if not settings.database_url.startswith(("postgresql://", "postgres://")):
 print(f"✅ Using PostgreSQL database: {settings.database_url.split('@')[1] if '@' in settings.database_url else 'configured'}", file=sys.stderr)
 engine = create_engine(settings.database_url, echo=True)
 
+# create_all only creates missing tables; columns and indexes added since are
+# applied here. Every statement is idempotent, so this is safe to run on each deploy.
+UPGRADES = [
+    # Keyset pagination and filtered lists (list_tasks); without these the
+    # user's tasks are sorted on every page
+    "CREATE INDEX IF NOT EXISTS ix_tasks_user_id_created_at_id ON tasks (user_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_user_id_completed_created_at_id ON tasks (user_id, completed, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_user_id_updated_at_id ON tasks (user_id, updated_at, id)",
+    # Manual ordering: existing rows share the first key and keep id order
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS position VARCHAR(255) COLLATE \"C\" NOT NULL DEFAULT 'a0'",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_user_id_position_id ON tasks (user_id, position, id)",
+    "CREATE INDEX IF NOT EXISTS ix_task_changes_user_id_changed_at ON task_changes (user_id, changed_at)",
+]
+
+def upgrade_database():
+    with engine.begin() as conn:
+        for statement in UPGRADES:
+            conn.execute(text(statement))
+
 def init_database():
     print("Creating database tables...")
+    partitions = settings.tasks_partitions
+    with engine.begin() as conn:
+        # tasks references users, so users must exist before a partitioned tasks is created
+        SQLModel.metadata.create_all(conn, tables=[User.__table__])
+        kind = tasks_relkind(conn)
+        if partitions and kind is None:
+            create_partitioned_tasks(conn, partitions)
+            print(f"Created tasks with {partitions} hash partitions on user_id")
+        elif partitions and kind == "r":
+            print("⚠️ TASKS_PARTITIONS is set but tasks is a plain table; "
+                  "run `python init_db.py --partition-tasks` to migrate it", file=sys.stderr)
+        elif partitions and kind == "p" and partition_count(conn) != partitions:
+            print(f"⚠️ tasks has {partition_count(conn)} partitions, TASKS_PARTITIONS is {partitions}; "
+                  "the existing layout is kept", file=sys.stderr)
     SQLModel.metadata.create_all(engine)
+    upgrade_database()
     print("Database initialized successfully!")
 
+def partition_tasks():
+    """Migrate an existing plain tasks table to TASKS_PARTITIONS hash partitions"""
+    if settings.tasks_partitions < 1:
+        print("❌ Set TASKS_PARTITIONS to the number of partitions to create", file=sys.stderr)
+        sys.exit(1)
+    # Bring the old table up to the current columns first so the copy is complete
+    upgrade_database()
+    with engine.begin() as conn:
+        copied = migrate_to_partitioned(conn, settings.tasks_partitions)
+    print(f"Copied {copied} tasks into {settings.tasks_partitions} partitions; "
+          "the old table is kept as tasks_unpartitioned")
+
 if __name__ == "__main__":
-    init_database()
+    if "--partition-tasks" in sys.argv[1:]:
+        partition_tasks()
+    else:
+        init_database()
 
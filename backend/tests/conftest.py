@@ -7,16 +7,19 @@ from sqlmodel import SQLModel, create_engine, Session
 from fastapi.testclient import TestClient
 from app.main import app
 from app.models import User, Task
-from app.dependencies.database import get_db_session
+from app.dependencies.auth import reload_auth_keys
+from app.dependencies.database import ThreadedSession, get_db_session
+from app.cache import cache
 
-# Use in-memory SQLite for testing
-TEST_DATABASE_URL = "sqlite:///./test.db"
+# Use SQLite for testing by default; set TEST_DATABASE_URL to run against PostgreSQL
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///./test.db")
 TEST_JWT_SECRET = "test-secret-key-for-jwt-testing-only-not-for-production-use"
 
 @pytest.fixture(scope="function")
 def test_db():
     """Create a test database for each test function"""
-    engine = create_engine(TEST_DATABASE_URL, echo=False, connect_args={"check_same_thread": False})
+    connect_args = {"check_same_thread": False} if TEST_DATABASE_URL.startswith("sqlite") else {}
+    engine = create_engine(TEST_DATABASE_URL, echo=False, connect_args=connect_args)
     SQLModel.metadata.create_all(engine)
     
     yield engine
@@ -42,16 +45,19 @@ def db_session(test_db):
 def client(test_db, monkeypatch):
     """Create a test client with test database"""
     # Override database dependency
-    def override_get_db():
+    async def override_get_db():
         with Session(test_db) as session:
-            yield session
+            yield ThreadedSession(session)
     
     # Override JWT secret for testing
     monkeypatch.setenv("BETTER_AUTH_SECRET", TEST_JWT_SECRET)
     from app.config import settings
     settings.better_auth_secret = TEST_JWT_SECRET
+    reload_auth_keys()
     
     app.dependency_overrides[get_db_session] = override_get_db
+    # Each test gets a fresh database, so cached responses from earlier tests are stale
+    cache.clear()
     
     yield TestClient(app)
     
@@ -0,0 +1,209 @@
+"""
+Tests for the shared cache tier (in-memory and Redis-protocol backends)
+"""
+import asyncio
+import threading
+import time
+import pytest
+from app.cache import CACHE_ERRORS, MemoryBackend, RedisBackend, SharedCache
+
+class RespStandIn:
+    """Tiny Redis-protocol server (GET/SET NX PX/DEL/PING) on a background thread"""
+    
+    def __init__(self):
+        self.data: dict[bytes, tuple[float | None, bytes]] = {}
+        self.commands = 0
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        threading.Thread(target=self._run, args=(ready,), daemon=True).start()
+        ready.wait()
+    
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.port}/0"
+    
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+    
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+    
+    async def _shutdown(self):
+        self.server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+    
+    async def _handle(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+    
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry and entry[0] is not None and entry[0] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+    
+    def _execute(self, args) -> bytes:
+        self.commands += 1
+        name = args[0].upper()
+        if name in (b"PING", b"SELECT", b"AUTH"):
+            return b"+OK\r\n"
+        if name == b"GET":
+            entry = self._live(args[1])
+            return b"$-1\r\n" if entry is None else b"$%d\r\n%s\r\n" % (len(entry[1]), entry[1])
+        if name == b"SET":
+            options = [arg.upper() for arg in args[3:]]
+            if b"NX" in options and self._live(args[1]) is not None:
+                return b"$-1\r\n"
+            expires = None
+            if b"PX" in options:
+                expires = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            self.data[args[1]] = (expires, args[2])
+            return b"+OK\r\n"
+        if name == b"DEL":
+            removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+            return b":%d\r\n" % removed
+        return b"-ERR unknown command\r\n"
+
+@pytest.fixture
+def resp_server():
+    server = RespStandIn()
+    yield server
+    server.close()
+
+def counting_loader(value: bytes, delay: float = 0.0):
+    calls = []
+    
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+    
+    return loader, calls
+
+def test_memory_backend_lru_and_ttl():
+    """Test LRU eviction and TTL expiry of the in-memory backend"""
+    async def scenario():
+        backend = MemoryBackend(max_entries=2)
+        await backend.set("a", b"1", 60)
+        await backend.set("b", b"2", 60)
+        await backend.get("a")
+        await backend.set("c", b"3", 60)
+        assert await backend.get("b") is None
+        assert await backend.get("a") == b"1"
+        
+        await backend.set("d", b"4", -1)
+        assert await backend.get("d") is None
+        assert await backend.add("d", b"5", 60) is True
+        assert await backend.add("d", b"6", 60) is False
+    
+    asyncio.run(scenario())
+
+def test_memory_backend_byte_budget_and_sweep():
+    """Test that the byte budget evicts LRU entries and writes sweep expired ones"""
+    async def scenario():
+        backend = MemoryBackend(max_entries=100, max_bytes=25, sweep_interval=0)
+        await backend.set("a", b"x" * 9, 60)
+        await backend.set("b", b"x" * 9, 60)
+        await backend.set("c", b"x" * 9, 60)
+        assert await backend.get("a") is None
+        assert backend.nbytes() == 20
+        
+        await backend.set("b", b"x" * 40, 60)  # over the whole budget: not stored
+        assert await backend.get("b") is None
+        assert backend.nbytes() == 10
+        
+        await backend.set("d", b"1", -1)
+        await backend.set("e", b"2", 60)
+        assert backend.size() == 2  # "d" expired and was swept by the write of "e"
+        assert backend.nbytes() == 12
+        backend.clear()
+        assert backend.nbytes() == 0
+    
+    asyncio.run(scenario())
+
+def test_invalidate_retires_user_entries():
+    """Test versioned invalidation only affects the invalidated user"""
+    async def scenario():
+        cache = SharedCache(MemoryBackend())
+        loader, calls = counting_loader(b"page")
+        for user_id in (1, 2):
+            await cache.get_or_load("tasks", user_id, "", loader)
+        await cache.get_or_load("tasks", 1, "", loader)
+        assert len(calls) == 2
+        
+        await cache.invalidate("tasks", 1)
+        await cache.get_or_load("tasks", 1, "", loader)
+        await cache.get_or_load("tasks", 2, "", loader)
+        assert len(calls) == 3
+    
+    asyncio.run(scenario())
+
+def test_concurrent_misses_share_one_load():
+    """Test that concurrent misses in one process run the loader once"""
+    async def scenario():
+        cache = SharedCache(MemoryBackend())
+        loader, calls = counting_loader(b"page", delay=0.05)
+        results = await asyncio.gather(*(cache.get_or_load("tasks", 1, "", loader) for _ in range(10)))
+        assert results == [b"page"] * 10
+        assert len(calls) == 1
+    
+    asyncio.run(scenario())
+
+def test_warm_entry_is_hit_on_another_worker(resp_server):
+    """Test that two workers with their own connections share entries and invalidations"""
+    async def scenario():
+        worker_a = SharedCache(RedisBackend(resp_server.url))
+        worker_b = SharedCache(RedisBackend(resp_server.url))
+        loader, calls = counting_loader(b"page")
+        
+        assert await worker_a.get_or_load("tasks", 1, "limit=50", loader) == b"page"
+        assert await worker_b.get_or_load("tasks", 1, "limit=50", loader) == b"page"
+        assert len(calls) == 1
+        
+        await worker_b.invalidate("tasks", 1)
+        await worker_a.get_or_load("tasks", 1, "limit=50", loader)
+        assert len(calls) == 2
+    
+    asyncio.run(scenario())
+
+def test_stampede_across_workers_loads_once(resp_server):
+    """Test that the backend lock lets one worker load while the others wait"""
+    async def scenario():
+        workers = [SharedCache(RedisBackend(resp_server.url)) for _ in range(4)]
+        loader, calls = counting_loader(b"page", delay=0.1)
+        results = await asyncio.gather(*(w.get_or_load("tasks", 1, "", loader) for w in workers))
+        assert results == [b"page"] * 4
+        assert len(calls) == 1
+    
+    asyncio.run(scenario())
+
+def test_unreachable_backend_falls_back_to_loader():
+    """Test that a dead cache server degrades to uncached loads"""
+    async def scenario():
+        cache = SharedCache(RedisBackend("redis://127.0.0.1:1/0", timeout=0.2))
+        errors = sum(CACHE_ERRORS.snapshot().values())
+        loader, calls = counting_loader(b"page")
+        assert await cache.get_or_load("tasks", 1, "", loader) == b"page"
+        assert len(calls) == 1
+        assert sum(CACHE_ERRORS.snapshot().values()) > errors
+    
+    asyncio.run(scenario())
@@ -0,0 +1,103 @@
+"""
+Tests for negotiated response compression
+"""
+import base64
+import gzip
+import json
+import pytest
+from app.compression import choose_encoding
+
+def create_tasks(client, auth_token, user_id, count=40):
+    response = client.post(
+        f"/api/{user_id}/tasks:batch",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json=[{"title": f"Task {i}", "description": "Repetitive description text"} for i in range(count)]
+    )
+    assert response.status_code == 201
+
+def test_choose_encoding_respects_q_values():
+    """Test that the client's q-values win and ties use server preference"""
+    available = ("zstd", "br", "gzip")
+    assert choose_encoding("gzip, deflate", available) == "gzip"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", available) == "gzip"
+    assert choose_encoding("gzip, br, zstd", available) == "zstd"
+    assert choose_encoding("*;q=0.1, br;q=0", ("br", "gzip")) == "gzip"
+    assert choose_encoding("identity", available) is None
+    assert choose_encoding(None, available) is None
+
+def test_large_list_is_gzipped(client, auth_token, test_user):
+    """Test that a list above the threshold is gzip-encoded with a weak ETag"""
+    create_tasks(client, auth_token, test_user.id)
+    headers = {"Authorization": f"Bearer {auth_token}", "Accept-Encoding": "gzip"}
+    response = client.get(f"/api/{test_user.id}/tasks", headers=headers)
+    
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()["tasks"]) == 40
+    
+    etag = response.headers["etag"]
+    assert etag.startswith("W/")
+    revalidated = client.get(f"/api/{test_user.id}/tasks", headers={**headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_large_list_other_encodings(client, auth_token, test_user, encoding, module):
+    """Test brotli and zstd negotiation when the optional packages are installed"""
+    pytest.importorskip(module)
+    create_tasks(client, auth_token, test_user.id)
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}", "Accept-Encoding": encoding}
+    )
+    
+    assert response.headers["content-encoding"] == encoding
+    assert len(response.json()["tasks"]) == 40
+
+def test_small_response_not_compressed(client):
+    """Test that responses under the threshold are sent as-is"""
+    response = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+def test_mangum_returns_compressed_body_as_base64(client, auth_token, test_user):
+    """Test that the Vercel handler base64-encodes compressed bodies"""
+    from api.index import handler
+    create_tasks(client, auth_token, test_user.id)
+    event = {
+        "resource": "/{proxy+}",
+        "path": f"/api/{test_user.id}/tasks",
+        "httpMethod": "GET",
+        "headers": {"Authorization": f"Bearer {auth_token}", "Accept-Encoding": "gzip", "Host": "example.com"},
+        "multiValueHeaders": {},
+        "queryStringParameters": None,
+        "multiValueQueryStringParameters": None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {"resourcePath": "/{proxy+}", "httpMethod": "GET", "path": "/", "stage": "prod",
+                           "identity": {"sourceIp": "127.0.0.1"}},
+        "body": None,
+        "isBase64Encoded": False,
+    }
+    result = handler(event, None)
+    
+    assert result["statusCode"] == 200
+    assert result["isBase64Encoded"] is True
+    body = gzip.decompress(base64.b64decode(result["body"]))
+    assert len(json.loads(body)["tasks"]) == 40
+
+def test_ensure_binary_body_reencodes_text_bodies():
+    """Test that a compressed body Mangum passed through as text is base64-encoded"""
+    from api.index import ensure_binary_body
+    compressed = b"compressed bytes that happen to be valid UTF-8"
+    result = ensure_binary_body({
+        "statusCode": 200,
+        "headers": {"content-encoding": "gzip"},
+        "body": compressed.decode("utf-8"),
+        "isBase64Encoded": False,
+    })
+    
+    assert result["isBase64Encoded"] is True
+    assert base64.b64decode(result["body"]) == compressed
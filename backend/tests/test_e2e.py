@@ -52,7 +52,7 @@ def test_full_user_flow(client):
         headers={"Authorization": f"Bearer {token}"}
     )
     assert list_response.status_code == 200
-    tasks = list_response.json()
+    tasks = list_response.json()["tasks"]
     assert len(tasks) == 1
     assert tasks[0]["id"] == task_id
     
@@ -108,7 +108,7 @@ def test_full_user_flow(client):
         headers={"Authorization": f"Bearer {token}"}
     )
     assert final_list.status_code == 200
-    assert len(final_list.json()) == 0
+    assert len(final_list.json()["tasks"]) == 0
 
 def test_multi_user_isolation_flow(client):
     """Test that multiple users can work independently"""
@@ -151,12 +151,12 @@ def test_multi_user_isolation_flow(client):
     user1_tasks = client.get(
         f"/api/{user1_id}/tasks",
         headers={"Authorization": f"Bearer {user1_token}"}
-    ).json()
+    ).json()["tasks"]
     
     user2_tasks = client.get(
         f"/api/{user2_id}/tasks",
         headers={"Authorization": f"Bearer {user2_token}"}
-    ).json()
+    ).json()["tasks"]
     
     assert len(user1_tasks) == 2
     assert len(user2_tasks) == 1
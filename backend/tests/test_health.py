@@ -12,7 +12,5 @@ def test_health_check(client):
     assert data["status"] == "healthy"
     assert "timestamp" in data
     assert data["version"] == "1.0.0"
-
-
-
-
+    # Cache internals are only on the admin-protected /metrics
+    assert "cache" not in data
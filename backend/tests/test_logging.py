@@ -0,0 +1,87 @@
+"""
+Tests for structured logging and access-log sampling
+"""
+import io
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.log import AccessLogMiddleware, LOGS_DROPPED, configure_logging, flush_logs, get_logger, parse_sample_rates
+
+@pytest.fixture
+def log_stream():
+    """Capture the app's JSON log lines; restores the configured logging afterwards"""
+    stream = io.StringIO()
+    configure_logging("DEBUG", background=True, stream=stream)
+    
+    def lines():
+        flush_logs()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+    
+    yield lines
+    configure_logging(settings.log_level, settings.log_background, settings.log_queue_size)
+
+def make_app(**options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(AccessLogMiddleware, **options)
+    
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+    
+    @app.get("/fail")
+    async def fail():
+        raise RuntimeError("boom")
+    
+    return app
+
+def test_records_are_json_with_fields_and_traceback(log_stream):
+    """Test that keyword fields and exception tracebacks end up in the JSON line"""
+    log = get_logger("app.test")
+    log.debug("skipped step", step=1)
+    try:
+        raise ValueError("bad value")
+    except ValueError as e:
+        log.error("step failed", user_id=7, exc_info=e)
+    
+    first, second = log_stream()
+    assert first == {**first, "level": "debug", "logger": "app.test", "msg": "skipped step", "step": 1}
+    assert second["user_id"] == 7
+    assert 'raise ValueError("bad value")' in second["exc"]
+
+def test_access_log_is_sampled_per_route(log_stream):
+    """Test one line per sampled request, route overrides, and errors kept at rate 0"""
+    app = make_app(sample_rate=0.0, route_rates=parse_sample_rates("/items/{item_id}=1"))
+    client = TestClient(app, raise_server_exceptions=False)
+    
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+    client.get("/fail")
+    
+    requests = [line for line in log_stream() if line["logger"] == "app.access"]
+    assert [(line["route"], line["status"]) for line in requests] == [
+        ("/items/{item_id}", 200),
+        ("/items/{item_id}", 200),
+        ("/fail", 500),
+    ]
+    assert requests[0]["path"] == "/items/1"
+    assert requests[0]["duration_ms"] >= 0
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test that a full writer queue drops and counts records"""
+    stream = io.StringIO()
+    configure_logging("INFO", background=True, queue_size=1, stream=stream)
+    before = LOGS_DROPPED.snapshot().get((), 0)
+    try:
+        log = get_logger("app.test")
+        for i in range(2000):
+            log.info("burst", i=i)
+        flush_logs()
+    finally:
+        configure_logging(settings.log_level, settings.log_background, settings.log_queue_size)
+    
+    written = len(stream.getvalue().splitlines())
+    assert LOGS_DROPPED.snapshot()[()] - before == 2000 - written
+    assert written < 2000
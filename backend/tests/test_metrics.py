@@ -0,0 +1,55 @@
+"""
+Tests for the in-process metrics registry
+"""
+import threading
+from app.metrics import Registry
+
+def test_updates_from_many_threads_are_all_counted():
+    """Test that per-thread shards merge exactly, including shards of exited threads"""
+    registry = Registry()
+    counter = registry.counter("jobs_total", "Jobs", ("kind",))
+    histogram = registry.histogram("job_seconds", "Job time", buckets=(0.1, 1.0))
+    
+    def work():
+        for i in range(1000):
+            counter.inc(kind="a" if i % 2 else "b")
+            histogram.observe(0.5)
+    
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(kind="a")
+    
+    assert counter.snapshot() == {("a",): 4001, ("b",): 4000}
+    assert histogram.snapshot()[()] == {"buckets": {0.1: 0, 1.0: 8000, float("inf"): 8000}, "sum": 4000.0, "count": 8000}
+    # exited threads were folded in and their shards released; the totals stay
+    assert len(counter._shards) == 1
+    assert counter.snapshot() == {("a",): 4001, ("b",): 4000}
+
+def test_prometheus_text_format():
+    """Test counter, gauge and histogram rendering with escaped label values"""
+    registry = Registry()
+    registry.counter("logins_total", "Logins", ("outcome",)).inc(outcome='bad "pw"\n')
+    gauge = registry.gauge("in_flight", "In flight")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0)).observe(0.25, route="/a")
+    
+    assert registry.render_prometheus() == (
+        "# HELP in_flight In flight\n"
+        "# TYPE in_flight gauge\n"
+        "in_flight 1.0\n"
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{route="/a",le="0.1"} 0\n'
+        'latency_seconds_bucket{route="/a",le="1.0"} 1\n'
+        'latency_seconds_bucket{route="/a",le="+Inf"} 1\n'
+        'latency_seconds_sum{route="/a"} 0.25\n'
+        'latency_seconds_count{route="/a"} 1\n'
+        "# HELP logins_total Logins\n"
+        "# TYPE logins_total counter\n"
+        'logins_total{outcome="bad \\"pw\\"\\n"} 1.0\n'
+    )
@@ -0,0 +1,143 @@
+"""
+Tests for the event-loop lag monitor
+"""
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.loop_monitor import LOOP_BLOCKED, LOOP_LAG, LoopMonitor, LoopMonitorMiddleware
+
+def make_app(monitor: LoopMonitor) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(LoopMonitorMiddleware, monitor=monitor)
+    
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    
+    @app.get("/items/{item_id}/slow")
+    async def slow(item_id: int):
+        time.sleep(0.3)  # blocking call inside an async handler
+        return {"id": item_id}
+    
+    return app
+
+def wait_for(predicate, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_blocking_handler_is_reported_with_route_and_stack():
+    """Test that a handler holding the loop is recorded with its route template and stack"""
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    before = LOOP_BLOCKED.snapshot().get(("/items/{item_id}/slow",), 0)
+    
+    with TestClient(make_app(monitor)) as client:
+        assert client.get("/ping").status_code == 200
+        assert client.get("/items/7/slow").status_code == 200
+        assert wait_for(lambda: any(e["blocked_ms"] is not None for e in monitor.events))
+    monitor.stop()
+    
+    event = next(e for e in monitor.events if e["route"] == "/items/{item_id}/slow")
+    assert event["method"] == "GET"
+    assert event["blocked_ms"] >= 200
+    assert any("time.sleep(0.3)" in line for line in event["stack"])
+    assert LOOP_BLOCKED.snapshot()[("/items/{item_id}/slow",)] == before + 1
+
+def test_idle_loop_records_lag_without_stalls():
+    """Test that lag is sampled and a non-blocking request raises no stall"""
+    monitor = LoopMonitor(interval=0.01, threshold=0.2)
+    samples_before = sum(s["count"] for s in LOOP_LAG.snapshot().values())
+    
+    with TestClient(make_app(monitor)) as client:
+        assert client.get("/ping").status_code == 200
+        assert wait_for(lambda: sum(s["count"] for s in LOOP_LAG.snapshot().values()) > samples_before + 5)
+    monitor.stop()
+    
+    assert list(monitor.events) == []
+
+def test_server_timing_reports_queries(client, auth_token, test_user, test_db):
+    """Test that task routes report their database time and query count"""
+    from app.db_telemetry import QUERIES_PER_REQUEST, instrument_engine
+    instrument_engine(test_db)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post(f"/api/{test_user.id}/tasks:batch", headers=headers, json=[{"title": "A"}, {"title": "B"}])
+    before = QUERIES_PER_REQUEST.snapshot().get(("/api/{user_id}/tasks",), {"count": 0})["count"]
+    
+    response = client.get(f"/api/{test_user.id}/tasks", headers=headers)
+    
+    timing = response.headers["server-timing"]
+    queries = int(timing.split('desc="')[1].split(" ")[0])
+    assert queries >= 2  # version aggregate plus the page
+    assert all(name in timing for name in ("db;dur=", "db-pool;dur=", "app;dur=", "total;dur="))
+    assert QUERIES_PER_REQUEST.snapshot()[("/api/{user_id}/tasks",)]["count"] == before + 1
+
+def test_pool_wait_is_measured_under_starvation():
+    """Test that a checkout blocked on a busy one-connection pool is timed"""
+    import threading
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import QueuePool
+    from app.db_telemetry import POOL_WAIT, RequestTimings, current_timings, instrument_engine
+    engine = create_engine(
+        "sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0,
+        connect_args={"check_same_thread": False}
+    )
+    instrument_engine(engine)
+    held = engine.connect()
+    threading.Timer(0.2, held.close).start()
+    
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+    finally:
+        current_timings.reset(token)
+    engine.dispose()
+    
+    assert timings.pool_wait >= 0.15
+    assert timings.queries == 1
+    assert POOL_WAIT.snapshot()[()]["buckets"][0.25] >= 1
+
+def test_db_report(client, monkeypatch):
+    """Test the aggregate telemetry endpoint"""
+    from app.config import settings
+    monkeypatch.setattr(settings, "admin_token", "admin-test-token")
+    response = client.get("/api/debug/db", headers={"Authorization": "Bearer admin-test-token"})
+    
+    assert response.status_code == 200
+    assert "db_query_seconds" in response.json()["metrics"]
+
+def test_metrics_endpoint_requires_admin_token(client, monkeypatch):
+    """Test that /metrics is hidden without ADMIN_TOKEN and rejects a wrong token"""
+    from app.config import settings
+    assert client.get("/metrics").status_code == 404
+    
+    monkeypatch.setattr(settings, "admin_token", "admin-test-token")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/api/debug/db", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+def test_metrics_report_requests_by_route_template(client, auth_token, test_user, monkeypatch):
+    """Test that requests are counted and timed per route template, with auth outcomes"""
+    from app.config import settings
+    monkeypatch.setattr(settings, "admin_token", "admin-test-token")
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.get(f"/api/{test_user.id}/tasks", headers=headers)
+    client.get(f"/api/{test_user.id}/tasks", headers={"Authorization": "Bearer not-a-jwt"})
+    
+    response = client.get("/metrics", headers={"Authorization": "Bearer admin-test-token"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_requests_total{method="GET",route="/api/{user_id}/tasks",status="200"}' in body
+    assert 'http_requests_total{method="GET",route="/api/{user_id}/tasks",status="401"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/{user_id}/tasks",le="+Inf"}' in body
+    assert f"/api/{test_user.id}/tasks" not in body
+    assert 'auth_attempts_total{action="token",outcome="invalid"}' in body
+    assert "http_requests_in_flight 1" in body  # the scrape itself
+    assert "# TYPE db_query_seconds histogram" in body
@@ -0,0 +1,74 @@
+"""
+Tests for hash partitioning of tasks by user_id
+"""
+import re
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.dialects import postgresql
+from app.partitioning import migrate_to_partitioned, partitioned_tasks_ddl
+from tests.conftest import TEST_DATABASE_URL
+
+def test_partitioned_ddl_matches_model():
+    """Test that the partitioned layout keeps the model's columns and indexes"""
+    statements = partitioned_tasks_ddl(postgresql.dialect(), 4)
+    
+    assert statements[0].endswith("PARTITION BY HASH (user_id)")
+    assert "PRIMARY KEY (id, user_id)" in statements[0]
+    assert 'position VARCHAR(255) COLLATE "C"' in statements[0]
+    assert statements[1:5] == [
+        f"CREATE TABLE tasks_p{r} PARTITION OF tasks FOR VALUES WITH (MODULUS 4, REMAINDER {r})"
+        for r in range(4)
+    ]
+    assert any("ix_tasks_user_id_position_id ON tasks (user_id, position, id)" in s for s in statements)
+
+@pytest.fixture
+def partitioned_db(test_db):
+    """Migrate the test database's tasks table to 4 hash partitions"""
+    if not TEST_DATABASE_URL.startswith("postgresql"):
+        pytest.skip("partitioning needs TEST_DATABASE_URL pointing at PostgreSQL")
+    with test_db.begin() as conn:
+        migrate_to_partitioned(conn, 4)
+        conn.execute(text("DROP TABLE tasks_unpartitioned"))
+    yield test_db
+
+def test_task_queries_prune_to_one_partition(partitioned_db, client, auth_token, test_user):
+    """Test that every statement the task routes run against tasks plans one partition"""
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if re.search(r"\btasks\b", statement) and not executemany:
+            statements.append((statement, parameters))
+    
+    event.listen(partitioned_db, "before_cursor_execute", capture)
+    try:
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        base = f"/api/{test_user.id}/tasks"
+        task = client.post(base, headers=headers, json={"title": "One"}).json()
+        client.post(f"{base}:batch", headers=headers, json=[{"title": "Two"}, {"title": "Three"}])
+        page = client.get(base, headers=headers, params={"limit": 1}).json()
+        client.get(base, headers=headers, params={"limit": 1, "cursor": page["next_cursor"]})
+        client.get(base, headers=headers, params={"sort": "position", "completed": "false"})
+        client.get(f"{base}/{task['id']}", headers=headers)
+        client.put(f"{base}/{task['id']}", headers=headers, json={"title": "One!"})
+        client.patch(f"{base}/{task['id']}", headers=headers, json={"title": "One!"})
+        client.patch(f"{base}/{task['id']}/complete", headers=headers, json={"completed": True})
+        client.post(f"{base}/{task['id']}/move", headers=headers, json={"after_id": None})
+        since = client.get(f"{base}/changes", headers=headers).json()["since"]
+        client.post(f"{base}:bulk", headers=headers, json={"action": "complete", "completed": False})
+        # Pages from a real watermark, so the changes query loads the bulk-updated tasks
+        client.get(f"{base}/changes", headers=headers, params={"since": since})
+        client.delete(f"{base}/{task['id']}", headers=headers)
+        client.post(f"{base}:bulk", headers=headers, json={"action": "delete", "completed": True})
+    finally:
+        event.remove(partitioned_db, "before_cursor_execute", capture)
+    
+    checked = 0
+    with partitioned_db.connect() as conn:
+        for statement, parameters in statements:
+            # Inserts are routed to one partition at execution time; nothing to prune
+            if statement.lstrip().upper().startswith("INSERT INTO TASKS"):
+                continue
+            plan = "\n".join(row[0] for row in conn.exec_driver_sql("EXPLAIN " + statement, parameters))
+            assert len(set(re.findall(r"\btasks_p\d+\b", plan))) == 1, f"{statement}\n{plan}"
+            checked += 1
+    assert checked >= 10
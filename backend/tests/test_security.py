@@ -23,7 +23,7 @@ def test_user_isolation_list_tasks(client, auth_token, auth_token_user2, test_us
     user1_tasks = client.get(
         f"/api/{test_user.id}/tasks",
         headers={"Authorization": f"Bearer {auth_token}"}
-    ).json()
+    ).json()["tasks"]
     
     assert len(user1_tasks) == 2  # test_task + task1
     assert all(task["user_id"] == test_user.id for task in user1_tasks)
@@ -32,7 +32,7 @@ def test_user_isolation_list_tasks(client, auth_token, auth_token_user2, test_us
     user2_tasks = client.get(
         f"/api/{test_user2.id}/tasks",
         headers={"Authorization": f"Bearer {auth_token_user2}"}
-    ).json()
+    ).json()["tasks"]
     
     assert len(user2_tasks) == 1
     assert user2_tasks[0]["user_id"] == test_user2.id
@@ -120,3 +120,46 @@ def test_expired_token(client, test_user, monkeypatch):
     
     assert response.status_code == 401
 
+
+def test_repeated_token_is_verified_once(client, auth_token, test_user, monkeypatch):
+    """Test that a token seen before is answered from the verified-token cache"""
+    from app.dependencies import auth
+    decodes = []
+    codec = auth.get_token_codec()
+    real_decode = codec.decode
+    monkeypatch.setattr(codec, "decode", lambda *args, **kwargs: decodes.append(1) or real_decode(*args, **kwargs))
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    
+    for _ in range(3):
+        assert client.get(f"/api/{test_user.id}/tasks", headers=headers).status_code == 200
+    
+    assert len(decodes) == 1
+
+def test_secret_change_invalidates_cached_tokens(client, auth_token, test_user, monkeypatch):
+    """Test that tokens cached under the old secret are rejected after a reload"""
+    from app.config import settings
+    from app.dependencies.auth import reload_auth_keys
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get(f"/api/{test_user.id}/tasks", headers=headers).status_code == 200
+    
+    monkeypatch.setenv("BETTER_AUTH_SECRET", "rotated-secret-for-testing-only-not-for-production")
+    monkeypatch.setattr(settings, "better_auth_secret", "rotated-secret-for-testing-only-not-for-production")
+    reload_auth_keys()
+    
+    assert client.get(f"/api/{test_user.id}/tasks", headers=headers).status_code == 401
+
+def test_cached_token_expires_at_exp():
+    """Test that cache entries expire with their token and reset when the secret differs"""
+    import time
+    from app.dependencies.auth import VerifiedTokenCache
+    cache = VerifiedTokenCache(max_entries=2)
+    assert cache.get(b"a", "secret") is None  # first use binds the cache to the secret
+    cache.set(b"a", "secret", time.time() + 60, 1)
+    cache.set(b"b", "secret", time.time() - 1, 2)
+    cache.set(b"c", "secret", time.time() + 60, 3)
+    
+    assert cache.get(b"a", "secret") is None  # evicted as least recently used
+    assert cache.get(b"b", "secret") is None  # past its exp
+    assert cache.get(b"c", "secret") == 3
+    assert cache.get(b"c", "other-secret") is None
+    assert cache.size() == 0
@@ -0,0 +1,123 @@
+"""
+Tests for the delta sync endpoint
+"""
+import time
+from datetime import datetime, timedelta
+from app.routes.tasks import decode_watermark, encode_watermark
+
+def test_changes_without_since_returns_watermark(client, auth_token, test_user):
+    """Test that the first call only hands out a watermark"""
+    response = client.get(
+        f"/api/{test_user.id}/tasks/changes",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["tasks"] == []
+    assert data["deleted"] == []
+    assert data["since"]
+    assert data["has_more"] is False
+
+def test_changes_since_watermark(client, auth_token, test_user):
+    """Test that creates, updates and deletes after the watermark are returned"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    kept = client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Kept"}).json()
+    removed = client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Removed"}).json()
+    
+    since = client.get(f"/api/{test_user.id}/tasks/changes", headers=headers).json()["since"]
+    
+    # Nothing has changed yet
+    data = client.get(
+        f"/api/{test_user.id}/tasks/changes",
+        headers=headers,
+        params={"since": since}
+    ).json()
+    assert data["tasks"] == []
+    assert data["deleted"] == []
+    assert decode_watermark(data["since"])[0] == decode_watermark(since)[0]
+    
+    client.patch(
+        f"/api/{test_user.id}/tasks/{kept['id']}/complete",
+        headers=headers,
+        json={"completed": True}
+    )
+    added = client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Added"}).json()
+    client.delete(f"/api/{test_user.id}/tasks/{removed['id']}", headers=headers)
+    
+    data = client.get(
+        f"/api/{test_user.id}/tasks/changes",
+        headers=headers,
+        params={"since": since}
+    ).json()
+    
+    assert {t["id"] for t in data["tasks"]} == {kept["id"], added["id"]}
+    assert next(t for t in data["tasks"] if t["id"] == kept["id"])["completed"] is True
+    assert data["deleted"] == [removed["id"]]
+    assert data["since"] != since
+    
+    # Syncing from the new watermark returns nothing
+    data = client.get(
+        f"/api/{test_user.id}/tasks/changes",
+        headers=headers,
+        params={"since": data["since"]}
+    ).json()
+    assert data["tasks"] == []
+    assert data["deleted"] == []
+
+def test_changes_user_isolation(client, auth_token, auth_token_user2, test_user, test_user2):
+    """Test that one user's changes never appear in another user's sync"""
+    since = client.get(
+        f"/api/{test_user2.id}/tasks/changes",
+        headers={"Authorization": f"Bearer {auth_token_user2}"}
+    ).json()["since"]
+    
+    client.post(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"title": "User 1 Task"}
+    )
+    
+    data = client.get(
+        f"/api/{test_user2.id}/tasks/changes",
+        headers={"Authorization": f"Bearer {auth_token_user2}"},
+        params={"since": since}
+    ).json()
+    assert data["tasks"] == []
+    assert data["deleted"] == []
+
+def test_changes_invalid_token(client, auth_token, test_user):
+    """Test that a malformed sync token is rejected"""
+    response = client.get(
+        f"/api/{test_user.id}/tasks/changes",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"since": "???"}
+    )
+    
+    assert response.status_code == 400
+
+def test_changes_expired_watermark_requires_resync(client, auth_token, test_user):
+    """Test that a watermark older than the retention window is answered with 410"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    since = client.get(f"/api/{test_user.id}/tasks/changes", headers=headers).json()["since"]
+    change_id = decode_watermark(since)[0]
+    
+    for token in (encode_watermark(change_id, time.time() - 31 * 86400), "MA"):
+        response = client.get(f"/api/{test_user.id}/tasks/changes", headers=headers, params={"since": token})
+        assert response.status_code == 410
+        assert response.json()["resync"] is True
+
+def test_changes_pruned_past_retention(client, auth_token, test_user, db_session):
+    """Test that a write prunes the user's change-log rows older than the retention window"""
+    from sqlmodel import select
+    from app.models import TaskChange
+    db_session.add(TaskChange(user_id=test_user.id, task_id=999, changed_at=datetime.utcnow() - timedelta(days=40)))
+    db_session.commit()
+    
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "New"})
+    
+    db_session.expire_all()
+    task_ids = db_session.exec(select(TaskChange.task_id).where(TaskChange.user_id == test_user.id)).all()
+    assert 999 not in task_ids
+    assert len(task_ids) == 1
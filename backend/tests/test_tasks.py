@@ -11,7 +11,7 @@ def test_list_tasks_empty(client, auth_token, test_user):
     )
     
     assert response.status_code == 200
-    assert response.json() == []
+    assert response.json() == {"tasks": [], "next_cursor": None}
 
 def test_create_task(client, auth_token, test_user):
     """Test creating a task"""
@@ -55,11 +55,292 @@ def test_list_tasks(client, auth_token, test_user, test_task):
     )
     
     assert response.status_code == 200
-    tasks = response.json()
+    tasks = response.json()["tasks"]
     assert len(tasks) == 1
     assert tasks[0]["id"] == test_task.id
     assert tasks[0]["title"] == "Test Task"
 
+def test_list_tasks_paginated(client, auth_token, test_user, db_session):
+    """Test walking the task list with keyset cursors"""
+    from datetime import datetime
+    from app.models import Task
+    # Same created_at for every row so the id tie-breaker is exercised
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(5):
+        db_session.add(Task(user_id=test_user.id, title=f"Task {i}", created_at=created_at))
+    db_session.commit()
+    
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(
+            f"/api/{test_user.id}/tasks",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            params=params
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["tasks"]) <= 2
+        seen.extend(task["title"] for task in data["tasks"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert pages == 3
+    assert seen == [f"Task {i}" for i in range(5)]
+
+def test_list_tasks_limit_capped(client, auth_token, test_user, db_session):
+    """Test that the server enforces the maximum page size"""
+    from app.models import Task
+    from app.routes.tasks import MAX_PAGE_SIZE
+    for i in range(MAX_PAGE_SIZE + 1):
+        db_session.add(Task(user_id=test_user.id, title=f"Task {i}"))
+    db_session.commit()
+    
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"limit": MAX_PAGE_SIZE * 10}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["tasks"]) == MAX_PAGE_SIZE
+    assert data["next_cursor"] is not None
+
+def test_list_tasks_invalid_cursor(client, auth_token, test_user):
+    """Test that a malformed cursor is rejected"""
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"cursor": "not-a-cursor"}
+    )
+    
+    assert response.status_code == 400
+
+def test_list_tasks_filter_completed(client, auth_token, test_user, db_session):
+    """Test filtering the task list by completion status"""
+    from app.models import Task
+    db_session.add(Task(user_id=test_user.id, title="Open", completed=False))
+    db_session.add(Task(user_id=test_user.id, title="Done", completed=True))
+    db_session.commit()
+    
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"completed": "false"}
+    )
+    
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()["tasks"]] == ["Open"]
+
+def test_list_tasks_created_after(client, auth_token, test_user, db_session):
+    """Test filtering the task list by creation time"""
+    from datetime import datetime
+    from app.models import Task
+    db_session.add(Task(user_id=test_user.id, title="Old", created_at=datetime(2024, 1, 1)))
+    db_session.add(Task(user_id=test_user.id, title="New", created_at=datetime(2025, 1, 1)))
+    db_session.commit()
+    
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"created_after": "2024-06-01T00:00:00Z"}
+    )
+    
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()["tasks"]] == ["New"]
+
+def test_list_tasks_sort_title_desc_paginated(client, auth_token, test_user, db_session):
+    """Test sorting by title descending across cursor pages"""
+    from app.models import Task
+    for title in ["b", "d", "a", "c", "e"]:
+        db_session.add(Task(user_id=test_user.id, title=title))
+    db_session.commit()
+    
+    params = {"sort": "title", "order": "desc", "limit": 2}
+    seen = []
+    cursor = None
+    while True:
+        response = client.get(
+            f"/api/{test_user.id}/tasks",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            params={**params, **({"cursor": cursor} if cursor else {})}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(t["title"] for t in data["tasks"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert seen == ["e", "d", "c", "b", "a"]
+
+def test_list_tasks_cursor_sort_mismatch(client, auth_token, test_user, db_session):
+    """Test that a cursor cannot be replayed against a different sort order"""
+    from app.models import Task
+    for i in range(3):
+        db_session.add(Task(user_id=test_user.id, title=f"Task {i}"))
+    db_session.commit()
+    
+    first = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"limit": 1}
+    ).json()
+    
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"cursor": first["next_cursor"], "sort": "title"}
+    )
+    
+    assert response.status_code == 400
+
+def test_list_tasks_invalid_sort(client, auth_token, test_user):
+    """Test that unknown sort fields are rejected"""
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"sort": "password_hash"}
+    )
+    
+    assert response.status_code == 422
+
+def test_list_tasks_etag_not_modified(client, auth_token, test_user, test_task):
+    """Test that an unchanged collection answers If-None-Match with 304"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get(f"/api/{test_user.id}/tasks", headers=headers)
+    
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    
+    cached = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+def test_list_tasks_etag_changes_on_write(client, auth_token, test_user, test_task):
+    """Test that creating or deleting a task changes the collection ETag"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    etag = client.get(f"/api/{test_user.id}/tasks", headers=headers).headers["etag"]
+    
+    client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Another"})
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    
+    etag = response.headers["etag"]
+    client.delete(f"/api/{test_user.id}/tasks/{test_task.id}", headers=headers)
+    response = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["tasks"]) == 1
+
+def test_list_tasks_served_from_cache(client, auth_token, test_user, test_task, db_session):
+    """Test that a repeat list is served from the cache and API writes invalidate it"""
+    from app.models import Task
+    from app.cache import CACHE_REQUESTS
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    first = client.get(f"/api/{test_user.id}/tasks", headers=headers)
+    hits = CACHE_REQUESTS.snapshot().get(("tasks", "hit"), 0)
+    
+    # A row written behind the API's back is invisible until the entry is invalidated
+    db_session.add(Task(user_id=test_user.id, title="Out of band"))
+    db_session.commit()
+    second = client.get(f"/api/{test_user.id}/tasks", headers=headers)
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    # One hit for the ETag and one for the page
+    assert CACHE_REQUESTS.snapshot()[("tasks", "hit")] == hits + 2
+    
+    client.patch(
+        f"/api/{test_user.id}/tasks/{test_task.id}/complete",
+        headers=headers,
+        json={"completed": True}
+    )
+    tasks = client.get(f"/api/{test_user.id}/tasks", headers=headers).json()["tasks"]
+    assert len(tasks) == 2
+    assert tasks[0]["completed"] is True
+
+def test_list_tasks_not_modified_skips_page_query(client, auth_token, test_user, test_task, test_db, monkeypatch):
+    """Test that a matching If-None-Match is answered from the version query alone, even uncached"""
+    from sqlalchemy import event
+    from app.cache import cache
+    monkeypatch.setattr(cache, "enabled", False)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    etag = client.get(f"/api/{test_user.id}/tasks", headers=headers).headers["etag"]
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(test_db, "before_cursor_execute", record)
+    try:
+        response = client.get(f"/api/{test_user.id}/tasks", headers={**headers, "If-None-Match": etag})
+    finally:
+        event.remove(test_db, "before_cursor_execute", record)
+    
+    assert response.status_code == 304
+    task_selects = [s for s in statements if "FROM tasks" in s]
+    assert len(task_selects) == 1
+    assert "count(" in task_selects[0].lower()
+
+def test_list_tasks_cache_disabled(client, auth_token, test_user, test_task, db_session, monkeypatch):
+    """Test that the cache switch sends every list to the database"""
+    from app.models import Task
+    from app.cache import cache
+    monkeypatch.setattr(cache, "enabled", False)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.get(f"/api/{test_user.id}/tasks", headers=headers)
+    
+    db_session.add(Task(user_id=test_user.id, title="Out of band"))
+    db_session.commit()
+    assert len(client.get(f"/api/{test_user.id}/tasks", headers=headers).json()["tasks"]) == 2
+
+def test_get_task_conditional(client, auth_token, test_user, test_task):
+    """Test ETag and Last-Modified revalidation for a single task"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get(f"/api/{test_user.id}/tasks/{test_task.id}", headers=headers)
+    
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+    
+    assert client.get(
+        f"/api/{test_user.id}/tasks/{test_task.id}",
+        headers={**headers, "If-None-Match": etag}
+    ).status_code == 304
+    assert client.get(
+        f"/api/{test_user.id}/tasks/{test_task.id}",
+        headers={**headers, "If-Modified-Since": last_modified}
+    ).status_code == 304
+    
+    client.put(
+        f"/api/{test_user.id}/tasks/{test_task.id}",
+        headers=headers,
+        json={"title": "Changed"}
+    )
+    response = client.get(
+        f"/api/{test_user.id}/tasks/{test_task.id}",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "Changed"
+
 def test_get_task(client, auth_token, test_user, test_task):
     """Test getting a single task"""
     response = client.get(
@@ -156,3 +437,406 @@ def test_create_task_unauthorized(client, test_user):
     # FastAPI HTTPBearer returns 401 for missing token
     assert response.status_code == 401
 
+
+def test_create_tasks_batch(client, auth_token, test_user):
+    """Test creating many tasks in one request"""
+    items = [{"title": f"Batch {i}", "description": f"Item {i}"} for i in range(5)]
+    response = client.post(
+        f"/api/{test_user.id}/tasks:batch",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json=items
+    )
+    
+    assert response.status_code == 201
+    data = response.json()
+    assert [t["title"] for t in data["tasks"]] == [f"Batch {i}" for i in range(5)]
+    assert all(t["user_id"] == test_user.id and t["completed"] is False for t in data["tasks"])
+    assert data["errors"] == []
+    
+    listed = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    ).json()["tasks"]
+    assert [t["title"] for t in listed] == [f"Batch {i}" for i in range(5)]
+
+def test_create_tasks_batch_rejects_invalid(client, auth_token, test_user):
+    """Test that one invalid item rejects the whole batch by default"""
+    response = client.post(
+        f"/api/{test_user.id}/tasks:batch",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json=[{"title": "Good"}, {"description": "no title"}, {"title": "x" * 256}]
+    )
+    
+    assert response.status_code == 422
+    assert [e["index"] for e in response.json()["detail"]] == [1, 2]
+    
+    listed = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    ).json()["tasks"]
+    assert listed == []
+
+def test_create_tasks_batch_partial(client, auth_token, test_user):
+    """Test that partial mode creates the valid items and reports the rest"""
+    response = client.post(
+        f"/api/{test_user.id}/tasks:batch",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"partial": "true"},
+        json=[{"title": "First"}, {"description": "no title"}, {"title": "Third"}]
+    )
+    
+    assert response.status_code == 201
+    data = response.json()
+    assert [t["title"] for t in data["tasks"]] == ["First", "Third"]
+    assert [e["index"] for e in data["errors"]] == [1]
+
+def test_create_tasks_batch_too_large(client, auth_token, test_user):
+    """Test that the per-request batch size is enforced"""
+    from app.routes.tasks import MAX_BATCH_SIZE
+    response = client.post(
+        f"/api/{test_user.id}/tasks:batch",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json=[{"title": "t"}] * (MAX_BATCH_SIZE + 1)
+    )
+    
+    assert response.status_code == 413
+
+def test_bulk_complete_by_ids(client, auth_token, test_user, db_session):
+    """Test completing several tasks by id in one request"""
+    from app.models import Task
+    tasks = [Task(user_id=test_user.id, title=f"Task {i}") for i in range(3)]
+    db_session.add_all(tasks)
+    db_session.commit()
+    ids = [t.id for t in tasks]
+    
+    response = client.post(
+        f"/api/{test_user.id}/tasks:bulk",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"action": "complete", "ids": ids[:2]}
+    )
+    
+    assert response.status_code == 200
+    assert sorted(response.json()["affected"]) == sorted(ids[:2])
+    
+    listed = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    ).json()["tasks"]
+    assert {t["id"]: t["completed"] for t in listed} == {ids[0]: True, ids[1]: True, ids[2]: False}
+
+def test_bulk_delete_completed(client, auth_token, test_user, db_session):
+    """Test clearing completed tasks with a filter"""
+    from app.models import Task
+    db_session.add(Task(user_id=test_user.id, title="Open", completed=False))
+    db_session.add(Task(user_id=test_user.id, title="Done 1", completed=True))
+    db_session.add(Task(user_id=test_user.id, title="Done 2", completed=True))
+    db_session.commit()
+    
+    response = client.post(
+        f"/api/{test_user.id}/tasks:bulk",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"action": "delete", "completed": True}
+    )
+    
+    assert response.status_code == 200
+    assert len(response.json()["affected"]) == 2
+    assert response.json()["has_more"] is False
+    
+    listed = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    ).json()["tasks"]
+    assert [t["title"] for t in listed] == ["Open"]
+
+def test_bulk_is_user_scoped(client, auth_token, test_user, test_user2, db_session):
+    """Test that bulk actions never touch another user's tasks"""
+    from app.models import Task
+    other = Task(user_id=test_user2.id, title="Not yours")
+    db_session.add(other)
+    db_session.commit()
+    
+    response = client.post(
+        f"/api/{test_user.id}/tasks:bulk",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"action": "delete", "ids": [other.id]}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["affected"] == []
+    db_session.expire_all()
+    assert db_session.get(Task, other.id) is not None
+
+def test_bulk_requires_selector(client, auth_token, test_user):
+    """Test that a bulk action needs exactly one of ids or a filter"""
+    response = client.post(
+        f"/api/{test_user.id}/tasks:bulk",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"action": "delete"}
+    )
+    
+    assert response.status_code == 400
+
+def test_bulk_too_many_ids(client, auth_token, test_user):
+    """Test that the per-request id cap is enforced"""
+    from app.routes.tasks import MAX_BULK_IDS
+    response = client.post(
+        f"/api/{test_user.id}/tasks:bulk",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"action": "complete", "ids": list(range(1, MAX_BULK_IDS + 2))}
+    )
+    
+    assert response.status_code == 413
+
+def test_create_task_idempotent_retry(client, auth_token, test_user):
+    """Test that a retried create with the same Idempotency-Key replays the first response"""
+    headers = {"Authorization": f"Bearer {auth_token}", "Idempotency-Key": "create-1"}
+    first = client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Once"})
+    retry = client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Once"})
+    
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    
+    listed = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    ).json()["tasks"]
+    assert [t["title"] for t in listed] == ["Once"]
+
+def test_idempotency_key_reused_with_different_body(client, auth_token, test_user):
+    """Test that reusing a key for a different request is rejected"""
+    headers = {"Authorization": f"Bearer {auth_token}", "Idempotency-Key": "create-2"}
+    client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "First"})
+    response = client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Second"})
+    
+    assert response.status_code == 422
+
+def test_idempotency_key_in_flight(client, auth_token, test_user):
+    """Test that a duplicate arriving while the original is still running gets 409"""
+    from app.dependencies import idempotency
+    idempotency._in_flight.add((test_user.id, "create-3"))
+    try:
+        response = client.post(
+            f"/api/{test_user.id}/tasks",
+            headers={"Authorization": f"Bearer {auth_token}", "Idempotency-Key": "create-3"},
+            json={"title": "Racing"}
+        )
+    finally:
+        idempotency._in_flight.discard((test_user.id, "create-3"))
+    
+    assert response.status_code == 409
+
+def test_idempotency_key_expires(client, auth_token, test_user, monkeypatch):
+    """Test that an expired key is treated as new and overwritten"""
+    from app.config import settings
+    monkeypatch.setattr(settings, "idempotency_ttl_seconds", -1)
+    headers = {"Authorization": f"Bearer {auth_token}", "Idempotency-Key": "create-4"}
+    client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Old"})
+    response = client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "New"})
+    
+    assert response.status_code == 201
+    assert "idempotent-replayed" not in response.headers
+
+def test_batch_and_bulk_idempotent_retry(client, auth_token, test_user):
+    """Test that batch creates and bulk actions replay on retry"""
+    headers = {"Authorization": f"Bearer {auth_token}", "Idempotency-Key": "batch-1"}
+    items = [{"title": "A"}, {"title": "B"}]
+    first = client.post(f"/api/{test_user.id}/tasks:batch", headers=headers, json=items)
+    retry = client.post(f"/api/{test_user.id}/tasks:batch", headers=headers, json=items)
+    assert retry.json() == first.json()
+    
+    headers["Idempotency-Key"] = "bulk-1"
+    action = {"action": "delete", "completed": False}
+    first = client.post(f"/api/{test_user.id}/tasks:bulk", headers=headers, json=action)
+    retry = client.post(f"/api/{test_user.id}/tasks:bulk", headers=headers, json=action)
+    assert len(first.json()["affected"]) == 2
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+
+def test_patch_task_updates_only_given_fields(client, auth_token, test_user, test_task):
+    """Test that PATCH changes the provided fields and keeps the rest"""
+    response = client.patch(
+        f"/api/{test_user.id}/tasks/{test_task.id}",
+        headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "application/merge-patch+json"},
+        content='{"completed": true}'
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["completed"] is True
+    assert data["title"] == "Test Task"
+    assert data["description"] == "Test Description"
+    
+    response = client.patch(
+        f"/api/{test_user.id}/tasks/{test_task.id}",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"description": None}
+    )
+    assert response.json()["description"] is None
+    assert response.json()["completed"] is True
+
+def test_patch_task_noop_skips_write(client, auth_token, test_user, test_task, db_session):
+    """Test that a patch matching the stored values writes nothing"""
+    from sqlmodel import select
+    from app.models import TaskChange
+    response = client.patch(
+        f"/api/{test_user.id}/tasks/{test_task.id}",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"title": "Test Task", "completed": False}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["updated_at"] == test_task.updated_at.isoformat()
+    assert db_session.exec(select(TaskChange)).all() == []
+
+def test_patch_task_noop_runs_no_write_statements(client, auth_token, test_user, test_task, test_db):
+    """Test that a no-op patch neither locks nor prunes the change log nor updates the row"""
+    from sqlalchemy import event
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(test_db, "before_cursor_execute", record)
+    try:
+        response = client.patch(
+            f"/api/{test_user.id}/tasks/{test_task.id}",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={"description": test_task.description, "completed": False}
+        )
+    finally:
+        event.remove(test_db, "before_cursor_execute", record)
+    
+    assert response.status_code == 200
+    assert not [s for s in statements if "task_changes" in s or s.lstrip().upper().startswith("UPDATE")]
+
+def test_patch_task_rejects_null_title(client, auth_token, test_user, test_task):
+    """Test that title and completed cannot be removed"""
+    response = client.patch(
+        f"/api/{test_user.id}/tasks/{test_task.id}",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"title": None}
+    )
+    
+    assert response.status_code == 422
+
+def test_patch_task_not_found(client, auth_token, test_user, test_user2, db_session):
+    """Test that patching a missing or foreign task returns 404"""
+    from app.models import Task
+    other = Task(user_id=test_user2.id, title="Not yours")
+    db_session.add(other)
+    db_session.commit()
+    
+    for task_id in (other.id, 99999):
+        response = client.patch(
+            f"/api/{test_user.id}/tasks/{task_id}",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={"title": "Mine now"}
+        )
+        assert response.status_code == 404
+
+def list_titles(client, auth_token, user_id, **params):
+    response = client.get(
+        f"/api/{user_id}/tasks",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        params={"sort": "position", **params}
+    )
+    assert response.status_code == 200
+    return [t["title"] for t in response.json()["tasks"]]
+
+def test_new_tasks_append_in_manual_order(client, auth_token, test_user):
+    """Test that created tasks get increasing position keys"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "One"})
+    client.post(f"/api/{test_user.id}/tasks:batch", headers=headers, json=[{"title": "Two"}, {"title": "Three"}])
+    
+    assert list_titles(client, auth_token, test_user.id) == ["One", "Two", "Three"]
+    assert list_titles(client, auth_token, test_user.id, order="desc") == ["Three", "Two", "One"]
+
+def test_move_task_rewrites_one_row(client, auth_token, test_user, db_session):
+    """Test that a move changes only the moved task's position"""
+    from sqlmodel import select
+    from app.models import Task
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ids = [
+        client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": title}).json()["id"]
+        for title in ("A", "B", "C")
+    ]
+    before = {t.id: t.position for t in db_session.exec(select(Task)).all()}
+    
+    response = client.post(f"/api/{test_user.id}/tasks/{ids[2]}/move", headers=headers, json={"after_id": ids[0]})
+    assert response.status_code == 200
+    assert list_titles(client, auth_token, test_user.id) == ["A", "C", "B"]
+    
+    db_session.expire_all()
+    after = {t.id: t.position for t in db_session.exec(select(Task)).all()}
+    assert [task_id for task_id in ids if after[task_id] != before[task_id]] == [ids[2]]
+    
+    client.post(f"/api/{test_user.id}/tasks/{ids[1]}/move", headers=headers, json={"after_id": None})
+    assert list_titles(client, auth_token, test_user.id) == ["B", "A", "C"]
+
+def test_move_task_between_equal_keys(client, auth_token, test_user, db_session):
+    """Test that tasks sharing the default key are renumbered on the first move"""
+    from app.models import Task
+    tasks = [Task(user_id=test_user.id, title=title) for title in ("A", "B", "C")]
+    db_session.add_all(tasks)
+    db_session.commit()
+    
+    response = client.post(
+        f"/api/{test_user.id}/tasks/{tasks[2].id}/move",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"after_id": tasks[0].id}
+    )
+    
+    assert response.status_code == 200
+    assert list_titles(client, auth_token, test_user.id) == ["A", "C", "B"]
+
+def test_move_task_paginates_by_position(client, auth_token, test_user):
+    """Test keyset pagination over manual order"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post(f"/api/{test_user.id}/tasks:batch", headers=headers, json=[{"title": str(i)} for i in range(5)])
+    
+    first = client.get(f"/api/{test_user.id}/tasks", headers=headers, params={"sort": "position", "limit": 3}).json()
+    second = client.get(
+        f"/api/{test_user.id}/tasks",
+        headers=headers,
+        params={"sort": "position", "limit": 3, "cursor": first["next_cursor"]}
+    ).json()
+    assert [t["title"] for t in first["tasks"] + second["tasks"]] == [str(i) for i in range(5)]
+
+def test_long_keys_are_rebalanced(client, auth_token, test_user, db_session, monkeypatch):
+    """Test that a move producing a long key renumbers the list in the background"""
+    from sqlmodel import select
+    from app.models import Task
+    from app.routes import tasks as task_routes
+    monkeypatch.setattr(task_routes, "POSITION_REBALANCE_LENGTH", 3)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ids = [
+        client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": title}).json()["id"]
+        for title in ("A", "B", "C")
+    ]
+    
+    # Repeatedly squeeze C and B in right after A so the keys keep growing
+    for _ in range(4):
+        client.post(f"/api/{test_user.id}/tasks/{ids[2]}/move", headers=headers, json={"after_id": ids[0]})
+        client.post(f"/api/{test_user.id}/tasks/{ids[1]}/move", headers=headers, json={"after_id": ids[0]})
+    
+    assert list_titles(client, auth_token, test_user.id) == ["A", "B", "C"]
+    db_session.expire_all()
+    assert max(len(t.position) for t in db_session.exec(select(Task)).all()) <= 3
+
+def test_move_task_not_found(client, auth_token, test_user, test_user2, test_task, db_session):
+    """Test that moving after another user's task is rejected"""
+    from app.models import Task
+    other = Task(user_id=test_user2.id, title="Not yours")
+    db_session.add(other)
+    db_session.commit()
+    
+    response = client.post(
+        f"/api/{test_user.id}/tasks/{test_task.id}/move",
+        headers={"Authorization": f"Bearer {auth_token}"},
+        json={"after_id": other.id}
+    )
+    
+    assert response.status_code == 404
@@ -0,0 +1,86 @@
+"""
+Tests for the token codecs and kid-based key rotation
+"""
+import time
+import pytest
+from app.tokens import KeySet, TokenError, TokenExpired, available_codecs, b64url_encode
+
+CODECS = list(available_codecs().values())
+
+def claims(**extra) -> dict:
+    now = int(time.time())
+    return {"user_id": 7, "email": "a@example.com", "iat": now, "exp": now + 60, **extra}
+
+@pytest.mark.parametrize("signer", CODECS, ids=lambda c: c.name)
+@pytest.mark.parametrize("verifier", CODECS, ids=lambda c: c.name)
+def test_codecs_are_interchangeable(signer, verifier):
+    """Test that a token from any codec verifies with every other, with and without a kid"""
+    for keys in (KeySet(default="secret"), KeySet.parse("k2=new,k1=old", default="secret")):
+        token = signer.encode(claims(), keys)
+        assert verifier.decode(token, keys)["user_id"] == 7
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda c: c.name)
+def test_codec_rejects_bad_tokens(codec):
+    """Test that expired, tampered, unsigned and unknown-kid tokens are rejected"""
+    keys = KeySet.parse("k1=secret")
+    with pytest.raises(TokenExpired):
+        codec.decode(codec.encode(claims(exp=int(time.time()) - 10), keys), keys)
+    
+    header, payload, signature = codec.encode(claims(), keys).split(".")
+    forged = b64url_encode(b'{"user_id":1,"exp":9999999999}').decode()
+    unsigned = b64url_encode(b'{"alg":"none","typ":"JWT","kid":"k1"}').decode()
+    for token in (f"{header}.{forged}.{signature}", f"{unsigned}.{payload}.", "not-a-jwt", ""):
+        with pytest.raises(TokenError):
+            codec.decode(token, keys)
+    
+    other = KeySet.parse("k9=secret")
+    with pytest.raises(TokenError):
+        codec.decode(codec.encode(claims(), other), keys)
+    assert not isinstance(TokenError("x"), TokenExpired)
+
+def test_key_rotation_keeps_existing_sessions(client, auth_token, test_user, monkeypatch):
+    """Test that after adding a signing key, old tokens still verify and new ones carry the new kid"""
+    from jose import jwt
+    from app.config import settings
+    from app.dependencies.auth import reload_auth_keys
+    
+    monkeypatch.setattr(settings, "auth_keys", "2026-10=rotated-key-for-testing-only")
+    reload_auth_keys()
+    
+    old = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get(f"/api/{test_user.id}/tasks", headers=old).status_code == 200
+    
+    response = client.post("/api/auth/login", json={"email": "test@example.com", "password": "testpassword123"})
+    new_token = response.json()["accessToken"]
+    assert jwt.get_unverified_header(new_token)["kid"] == "2026-10"
+    new = {"Authorization": f"Bearer {new_token}"}
+    assert client.get(f"/api/{test_user.id}/tasks", headers=new).status_code == 200
+    
+    # Retiring the key ends the sessions signed with it
+    monkeypatch.setattr(settings, "auth_keys", "")
+    reload_auth_keys()
+    assert client.get(f"/api/{test_user.id}/tasks", headers=new).status_code == 401
+    assert client.get(f"/api/{test_user.id}/tasks", headers=old).status_code == 200
+
+def test_keyset_parse():
+    """Test the AUTH_KEYS format and the fingerprint changing with the keys"""
+    keys = KeySet.parse(" k2 = two , k1=one,", default="legacy")
+    assert keys.signing_key() == ("k2", b"two")
+    assert keys.verification_key("k1") == b"one"
+    assert keys.verification_key(None) == b"legacy"
+    assert keys.fingerprint != KeySet.parse("k2=two", default="legacy").fingerprint
+    assert not KeySet.parse("")
+    with pytest.raises(ValueError):
+        KeySet.parse("k1=")
+
+def test_unknown_codec_is_an_error(monkeypatch):
+    """Test that a misspelled or unavailable AUTH_TOKEN_CODEC raises instead of falling back"""
+    from app.config import settings
+    from app.dependencies.auth import resolve_token_codec
+    from app.tokens import get_codec, pyjwt
+    monkeypatch.setattr(settings, "auth_token_codec", "nativ")
+    with pytest.raises(ValueError, match="nativ"):
+        resolve_token_codec()
+    if pyjwt is None:
+        with pytest.raises(ValueError, match="PyJWT"):
+            get_codec("pyjwt")
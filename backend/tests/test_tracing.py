@@ -0,0 +1,88 @@
+"""
+Tests for request tracing and traceparent propagation
+"""
+import json
+from app.tracing import FileExporter, Tracer, memory_exporter, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+def spans_by_name(trace: list[dict]) -> dict[str, dict]:
+    return {s["name"]: s for s in trace}
+
+def test_parse_traceparent():
+    """Test W3C traceparent parsing, including the sampled flag and invalid headers"""
+    assert parse_traceparent(TRACEPARENT) == (TRACE_ID, "00f067aa0ba902b7", True)
+    assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-00")[2] is False
+    assert parse_traceparent(f"01-{TRACE_ID}-00f067aa0ba902b7-01-future") is not None
+    for header in (None, "", "garbage", f"00-{TRACE_ID}-00f067aa0ba902b7-01-extra",
+                   f"ff-{TRACE_ID}-00f067aa0ba902b7-01", f"00-{'0' * 32}-00f067aa0ba902b7-01",
+                   f"00-{TRACE_ID}-zzzzzzzzzzzzzzzz-01"):
+        assert parse_traceparent(header) is None
+
+def test_sampled_request_records_auth_db_and_render_spans(client, auth_token, test_user, test_db):
+    """Test that a sampled traceparent yields one trace with child spans for the request's work"""
+    from app.db_telemetry import instrument_engine
+    instrument_engine(test_db)
+    headers = {"Authorization": f"Bearer {auth_token}", "traceparent": TRACEPARENT}
+    
+    response = client.post(f"/api/{test_user.id}/tasks", headers=headers, json={"title": "Traced"})
+    
+    assert response.status_code == 201
+    assert response.headers["traceresponse"].startswith(f"00-{TRACE_ID}-")
+    trace = memory_exporter.recent(1)[0]
+    root = trace[-1]
+    assert root["name"] == "POST /api/{user_id}/tasks"
+    assert root["parent_id"] == "00f067aa0ba902b7"
+    assert root["attributes"]["http.status_code"] == 201
+    spans = spans_by_name(trace)
+    assert {"auth.jwt_decode", "db.checkout", "db.query", "db.commit"} <= set(spans)
+    assert all(s["trace_id"] == TRACE_ID for s in trace)
+    assert spans["auth.jwt_decode"]["parent_id"] == root["span_id"]
+    assert any(s["attributes"].get("db.statement", "").startswith("INSERT") for s in trace)
+
+def test_login_trace_has_bcrypt_span(client, test_user):
+    """Test that password verification is timed as its own span"""
+    response = client.post(
+        "/api/auth/login",
+        headers={"traceparent": TRACEPARENT},
+        json={"email": "test@example.com", "password": "testpassword123"}
+    )
+    
+    assert response.status_code == 200
+    spans = spans_by_name(memory_exporter.recent(1)[0])
+    assert "auth.bcrypt_verify" in spans
+    assert "render.json" in spans
+
+def test_unsampled_requests_are_not_traced(client):
+    """Test that with a zero sample rate and no sampled parent nothing is recorded"""
+    before = len(memory_exporter.traces)
+    
+    response = client.get("/api/health", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-00"})
+    
+    assert "traceresponse" not in response.headers
+    assert len(memory_exporter.traces) == before
+
+def test_traces_endpoint_and_file_exporter(client, monkeypatch, tmp_path):
+    """Test the admin trace listing and the JSON-lines file exporter"""
+    from app.config import settings
+    from app.tracing import tracer
+    exporter = FileExporter(str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(tracer, "exporters", tracer.exporters + [exporter])
+    monkeypatch.setattr(settings, "admin_token", "admin-test-token")
+    client.get("/api/health", headers={"traceparent": TRACEPARENT})
+    exporter.queue.join()
+    
+    response = client.get("/api/debug/traces?limit=1", headers={"Authorization": "Bearer admin-test-token"})
+    
+    assert response.status_code == 200
+    assert response.json()["traces"][0][-1]["name"] == "GET /api/health"
+    lines = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    assert lines[-1]["name"] == "GET /api/health"
+    assert lines[-1]["trace_id"] == TRACE_ID
+
+def test_sample_rate_starts_new_traces():
+    """Test that a full sample rate traces requests without a traceparent"""
+    assert Tracer(sample_rate=0.0).start_trace("request") is None
+    root = Tracer(sample_rate=1.0).start_trace("request")
+    assert len(root.trace_id) == 32 and root.parent_id is None
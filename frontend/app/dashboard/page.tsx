@@ -6,20 +6,32 @@ import Footer from '@/components/layout/Footer';
 import TaskList from '@/components/tasks/TaskList';
 import TaskForm from '@/components/tasks/TaskForm';
 import { useAuth } from '@/components/auth/AuthProvider';
-import { apiRequest } from '@/lib/api-client';
-import { useState } from 'react';
+import { idempotentRequest } from '@/lib/api-client';
+import { useRef, useState } from 'react';
 
 export default function DashboardPage() {
   const { user } = useAuth();
   const [showForm, setShowForm] = useState(false);
+  // Idempotency-Key of the create that has not succeeded yet. Submitting the same
+  // task again after a failure reuses it, so the backend cannot create it twice
+  const pendingCreate = useRef<{ body: string; key: string } | null>(null);
   
   const handleCreateTask = async (data: { title: string; description: string | null; completed: boolean }) => {
     if (!user) return;
     
-    await apiRequest(`/api/${user.id}/tasks`, {
+    const body = JSON.stringify(data);
+    if (pendingCreate.current?.body !== body) {
+      pendingCreate.current = { body, key: crypto.randomUUID() };
+    }
+    const response = await idempotentRequest(`/api/${user.id}/tasks`, pendingCreate.current.key, {
       method: "POST",
-      body: JSON.stringify(data),
+      body,
     });
+    if (!response.ok) {
+      const error = await response.json().catch(() => null);
+      throw new Error(typeof error?.detail === "string" ? error.detail : "Unable to create task");
+    }
+    pendingCreate.current = null;
     
     setShowForm(false);
     window.location.reload();
@@ -48,10 +48,15 @@ export default function TaskDetailsPage() {
   const handleUpdate = async (data: { title: string; description: string | null; completed: boolean }) => {
     if (!user || !task) return;
     
+    // Send only the fields that changed; the server skips the write when nothing did
+    const changes = Object.fromEntries(
+      Object.entries(data).filter(([field, value]) => task[field as keyof typeof data] !== value)
+    );
+    
     try {
       await apiRequest(`/api/${user.id}/tasks/${task.id}`, {
-        method: "PUT",
-        body: JSON.stringify(data),
+        method: "PATCH",
+        body: JSON.stringify(changes),
       });
       router.push("/dashboard");
     } catch (err: any) {
@@ -24,44 +24,83 @@ interface TaskListProps {
   onCreateTask: () => void;
 }
 
+// The API's maximum page size; further pages are loaded on demand
+const PAGE_SIZE = 200;
+
+interface TaskPage {
+  tasks: Task[];
+  nextCursor: string | null;
+}
+
 export default function TaskList({ onCreateTask }: TaskListProps) {
   const { user } = useAuth();
   const [tasks, setTasks] = useState<Task[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
   const [deleteConfirm, setDeleteConfirm] = useState<number | null>(null);
   
+  // The API returns { tasks: [...], next_cursor } pages of at most PAGE_SIZE tasks
+  const fetchPage = useCallback(async (cursor: string | null): Promise<TaskPage> => {
+    if (!user) return { tasks: [], nextCursor: null };
+    
+    const query = `?limit=${PAGE_SIZE}` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : "");
+    const response = await apiRequest(`/api/${user.id}/tasks${query}`);
+    const data = await response.json();
+
+    if (Array.isArray(data)) {
+      return { tasks: data, nextCursor: null };
+    }
+    if (data && Array.isArray(data.tasks)) {
+      return { tasks: data.tasks, nextCursor: data.next_cursor ?? null };
+    }
+    if (data && typeof data === 'object' && 'detail' in data) {
+      // Handle error response from API
+      throw new Error(data.detail || "Unable to load tasks");
+    }
+    // Fallback: show nothing more if data format is unexpected
+    console.warn("Unexpected tasks data format:", data);
+    return { tasks: [], nextCursor: null };
+  }, [user]);
+  
   const fetchTasks = useCallback(async () => {
     if (!user) return;
     
     setLoading(true);
     setError("");
     try {
-      const response = await apiRequest(`/api/${user.id}/tasks`);
-      const data = await response.json();
-      
-      // Ensure data is an array
-      if (Array.isArray(data)) {
-        setTasks(data);
-      } else if (data && Array.isArray(data.tasks)) {
-        // Handle case where API returns { tasks: [...] }
-        setTasks(data.tasks);
-      } else if (data && typeof data === 'object' && 'detail' in data) {
-        // Handle error response from API
-        throw new Error(data.detail || "Unable to load tasks");
-      } else {
-        // Fallback: set empty array if data format is unexpected
-        console.warn("Unexpected tasks data format:", data);
-        setTasks([]);
-      }
+      const page = await fetchPage(null);
+      setTasks(page.tasks);
+      setNextCursor(page.nextCursor);
     } catch (err: any) {
       console.error("Error fetching tasks:", err);
       setError(err.message || "Unable to load tasks");
       setTasks([]); // Ensure tasks is always an array even on error
+      setNextCursor(null);
     } finally {
       setLoading(false);
     }
-  }, [user]);
+  }, [user, fetchPage]);
+  
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      setTasks((current) => {
+        const seen = new Set(current.map((task) => task.id));
+        return [...current, ...page.tasks.filter((task) => !seen.has(task.id))];
+      });
+      setNextCursor(page.nextCursor);
+    } catch (err: any) {
+      console.error("Error fetching tasks:", err);
+      setError(err.message || "Unable to load tasks");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
   
   useEffect(() => {
     fetchTasks();
@@ -75,8 +114,13 @@ export default function TaskList({ onCreateTask }: TaskListProps) {
         method: "PATCH",
         body: JSON.stringify({ completed }),
       });
-      await response.json();
-      fetchTasks();
+      const data = await response.json();
+      if (!response.ok) {
+        throw new Error(data?.detail || "Unable to update task");
+      }
+      const updated: Task = data;
+      // Update in place so pages loaded with "Load more" are kept
+      setTasks((current) => current.map((task) => (task.id === id ? updated : task)));
     } catch (err: any) {
       setError(err.message || "Unable to update task");
     }
@@ -86,10 +130,13 @@ export default function TaskList({ onCreateTask }: TaskListProps) {
     if (!user) return;
     
     try {
-      await apiRequest(`/api/${user.id}/tasks/${id}`, {
+      const response = await apiRequest(`/api/${user.id}/tasks/${id}`, {
         method: "DELETE",
       });
-      fetchTasks();
+      if (!response.ok && response.status !== 404) {
+        throw new Error("Unable to delete task");
+      }
+      setTasks((current) => current.filter((task) => task.id !== id));
       setDeleteConfirm(null);
     } catch (err: any) {
       setError(err.message || "Unable to delete task");
@@ -159,6 +206,14 @@ export default function TaskList({ onCreateTask }: TaskListProps) {
         ))}
       </div>
       
+      {nextCursor && (
+        <div className="mt-6 flex justify-center">
+          <Button variant="secondary" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
+      
       <ConfirmDialog
         isOpen={deleteConfirm !== null}
         title="Delete Task?"
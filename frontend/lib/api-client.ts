@@ -28,6 +28,11 @@ function getApiUrl(): string {
   return "http://localhost:8000";
 }
 
+// Thrown when the backend could not be reached at all, so the request may be retried
+export class NetworkError extends Error {
+  name = "NetworkError";
+}
+
 export async function apiRequest(endpoint: string, options: RequestInit = {}) {
   const session = await authClient.getSession();
   
@@ -71,9 +76,45 @@ export async function apiRequest(endpoint: string, options: RequestInit = {}) {
     
     if (err.message && (err.message.includes("Failed to fetch") || err.message.includes("NetworkError") || err.name === "TypeError")) {
       const errorMessage = `Cannot connect to backend server at ${API_URL}. Possible causes: 1. Backend server is not running 2. CORS configuration issue 3. Network connectivity problem To fix: - If running locally, start the backend: cd backend && python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 - Check that the backend is accessible at: ${API_URL}/api/health - Verify CORS settings in backend allow requests from: ${typeof window !== "undefined" ? window.location.origin : "your frontend URL"}`;
-      throw new Error(errorMessage);
+      throw new NetworkError(errorMessage);
     }
     throw err;
   }
 }
 
+// Waits between attempts of idempotentRequest; one retry per entry
+const RETRY_DELAYS_MS = [300, 1000, 3000];
+
+// 409 means the first attempt with this key is still being processed
+function isRetryableStatus(status: number): boolean {
+  return status === 409 || status >= 500;
+}
+
+/**
+ * Send a write with an Idempotency-Key and retry it on network errors, 409 and 5xx.
+ *
+ * The caller creates the key once per user action (e.g. one form submission)
+ * and passes the same key again if the user repeats that action. The backend
+ * then replays the stored response instead of writing twice.
+ */
+export async function idempotentRequest(endpoint: string, idempotencyKey: string, options: RequestInit = {}) {
+  const request = {
+    ...options,
+    headers: { ...options.headers, "Idempotency-Key": idempotencyKey },
+  };
+  for (let attempt = 0; ; attempt++) {
+    const lastAttempt = attempt >= RETRY_DELAYS_MS.length;
+    try {
+      const response = await apiRequest(endpoint, request);
+      if (lastAttempt || !isRetryableStatus(response.status)) {
+        return response;
+      }
+    } catch (err) {
+      if (lastAttempt || !(err instanceof NetworkError)) {
+        throw err;
+      }
+    }
+    await new Promise((resolve) => setTimeout(resolve, RETRY_DELAYS_MS[attempt]));
+  }
+}
+